@@ -0,0 +1,78 @@
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+CACHED_USER_FIELDS = (
+    'id', 'username', 'email', 'role', 'is_superuser', 'is_staff',
+    'is_active',
+)
+USER_CACHE_TIMEOUT = 15 * 60
+
+
+def get_user_generation_key(user_id):
+    return f'jwt-user-generation:{user_id}'
+
+
+def get_user_generation(user_id):
+    """Текущее поколение записи пользователя в кэше.
+
+    Пропавший счётчик заводится заново от текущего времени, а не с нуля,
+    чтобы не совпасть с поколением, под которым ещё лежат старые данные.
+    """
+    key = get_user_generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        return cache.get(key)
+    return generation
+
+
+def bump_user_generation(user_id):
+    key = get_user_generation_key(user_id)
+    cache.add(key, time.time_ns(), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснили между add и incr
+        cache.add(key, time.time_ns(), None)
+
+
+def get_user_cache_key(user_id, generation):
+    return f'jwt-user:{user_id}:{generation}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Берёт пользователя из кэша, а не из БД на каждый запрос.
+
+    Остальные поля модели отложены и загрузятся из БД при обращении.
+    Ключ записи включает поколение пользователя, которое сигналы
+    увеличивают при каждом изменении. Запрос, прочитавший пользователя
+    из БД до изменения, положит его под старым поколением, и следующие
+    запросы этой записи уже не увидят.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        key = get_user_cache_key(user_id, get_user_generation(user_id))
+        cached = cache.get(key)
+        if cached is None:
+            user = super().get_user(validated_token)
+            cache.set(
+                key,
+                {field: getattr(user, field) for field in CACHED_USER_FIELDS},
+                USER_CACHE_TIMEOUT
+            )
+            return user
+        # from_db ждёт значения в порядке полей модели
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in cached
+        ]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS,
+            field_names,
+            [cached[name] for name in field_names]
+        )
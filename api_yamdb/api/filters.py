@@ -1,19 +1,40 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
 from django_filters import FilterSet, filters
-from reviews.models import Title
+from reviews.models import Title, TitleListing
 
 
 class TitlesFilter(FilterSet):
+    """Фильтры списка произведений поверх TitleListing."""
     category = filters.CharFilter(
-        field_name='category__slug',
+        field_name='category_slug',
         lookup_expr='icontains')
     genre = filters.CharFilter(
-        field_name='genre__slug',
+        field_name='title__genre__slug',
         lookup_expr='icontains')
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains')
     year = filters.NumberFilter()
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
-        model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        model = TitleListing
+        fields = ('category', 'genre', 'name', 'year', 'search')
+
+    def filter_search(self, queryset, name, value):
+        substring = (
+            Q(name__icontains=value) | Q(description__icontains=value)
+        )
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(substring)
+        query = SearchQuery(value, config='russian')
+        # Всё условие на reviews_title, чтобы его GIN-индексы объединились
+        # в BitmapOr: OR через соединение с TitleListing индекс не берёт
+        titles = Title.objects.filter(
+            Q(search_vector=query) | substring
+        ).order_by().values('pk')
+        return queryset.filter(title_id__in=titles).annotate(
+            rank=SearchRank(F('title__search_vector'), query)
+        ).order_by('-rank', '-title_id')
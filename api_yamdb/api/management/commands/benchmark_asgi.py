@@ -0,0 +1,145 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает gunicorn с sync- и uvicorn-воркерами и сравнивает '
+        'задержки при большом числе медленных клиентов'
+    )
+    start_timeout = 30
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/v1/titles/')
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=10,
+            help='Запросов от каждого клиента'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Процессов gunicorn в обоих режимах'
+        )
+        parser.add_argument(
+            '--client-delay',
+            type=float,
+            default=0.05,
+            help='Секунд между частями запроса и между чтениями ответа'
+        )
+        parser.add_argument('--port', type=int, default=8765)
+
+    def start_server(self, interface, port, workers):
+        """Запускает gunicorn с той же конфигурацией, что и в контейнере."""
+        env = dict(os.environ, SERVER_INTERFACE=interface)
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                f'api_yamdb.{interface}:application',
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(workers),
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn ({interface}) не запустился')
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+            except OSError:
+                time.sleep(0.1)
+                continue
+            return server
+        server.kill()
+        raise CommandError(f'gunicorn ({interface}) не ответил за '
+                           f'{self.start_timeout} с')
+
+    async def request(self, port, url, delay, address):
+        """Медленный клиент: запрос уходит по частям, ответ читается так же.
+
+        Адрес клиента передаётся в X-Forwarded-For, как его выставил бы
+        nginx: иначе все клиенты делили бы одну корзину ограничителя.
+        """
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            writer.write(f'GET {url} HTTP/1.1\r\n'.encode())
+            await writer.drain()
+            await asyncio.sleep(delay)
+            writer.write(
+                f'Host: localhost\r\nX-Forwarded-For: {address}\r\n'
+                f'Connection: close\r\n\r\n'.encode()
+            )
+            await writer.drain()
+            status = await reader.readline()
+            while await reader.read(1024):
+                await asyncio.sleep(delay)
+        finally:
+            writer.close()
+        return status.split()[1] == b'200'
+
+    async def run_clients(self, port, url, clients, requests, delay):
+        latencies = []
+        errors = 0
+
+        async def client(number):
+            nonlocal errors
+            address = f'10.0.{number // 256}.{number % 256}'
+            for _ in range(requests):
+                started = time.perf_counter()
+                try:
+                    ok = await self.request(port, url, delay, address)
+                except (OSError, IndexError):
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(clients)))
+        return latencies, errors, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        port, workers = options['port'], options['workers']
+        for interface in ('wsgi', 'asgi'):
+            server = self.start_server(interface, port, workers)
+            try:
+                latencies, errors, elapsed = asyncio.run(self.run_clients(
+                    port,
+                    options['url'],
+                    options['clients'],
+                    options['requests'],
+                    options['client_delay'],
+                ))
+            finally:
+                server.terminate()
+                server.wait()
+            if not latencies:
+                raise CommandError(f'{interface}: ни одного успешного ответа')
+            self.stdout.write(
+                f'{interface}: {len(latencies) / elapsed:.0f} запросов/с, '
+                f'p50 {percentile(latencies, 0.5) * 1000:.0f} мс, '
+                f'p99 {percentile(latencies, 0.99) * 1000:.0f} мс, '
+                f'ошибок: {errors} '
+                f'({options["clients"]} клиентов, {workers} воркеров)'
+            )
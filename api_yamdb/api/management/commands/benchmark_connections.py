@@ -0,0 +1,69 @@
+import logging
+import time
+
+from api.throttling import TokenBucketThrottle
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность с переиспользованием '
+        'соединений с БД и без него'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/v1/titles/')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=60,
+            help='CONN_MAX_AGE для прогона с переиспользованием'
+        )
+
+    def run(self, url, requests, max_age):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        handler = WSGIHandler()
+        environ = RequestFactory().get(url).environ
+        opened = []
+
+        def count(sender, **kwargs):
+            opened.append(sender)
+
+        connection_created.connect(count)
+        succeeded = 0
+        started = time.perf_counter()
+        try:
+            for _ in range(requests):
+                response = handler(dict(environ), lambda *args: None)
+                succeeded += response.status_code == 200
+                response.close()
+        finally:
+            connection_created.disconnect(count)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'CONN_MAX_AGE={max_age}: {succeeded / elapsed:.0f} запросов/с, '
+            f'открыто соединений: {len(opened)}, '
+            f'переиспользовано: {max(succeeded - len(opened), 0)}, '
+            f'ошибок: {requests - succeeded}'
+        )
+
+    def handle(self, *args, **options):
+        logging.getLogger('api.timing').disabled = True
+        saved = connection.settings_dict['CONN_MAX_AGE']
+        rates = TokenBucketThrottle.THROTTLE_RATES
+        # Все запросы идут с одного адреса, и с ограничителями измерялись
+        # бы ответы 429, а не работа с БД
+        TokenBucketThrottle.THROTTLE_RATES = dict.fromkeys(rates)
+        try:
+            for max_age in (0, options['max_age']):
+                self.run(options['url'], options['requests'], max_age)
+        finally:
+            TokenBucketThrottle.THROTTLE_RATES = rates
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = saved
@@ -0,0 +1,56 @@
+import time
+
+from api.serializers import (CommentSerializer, CommentValuesSerializer,
+                             ReviewSerializer, ReviewValuesSerializer,
+                             TitleSerializer, TitleValuesSerializer)
+from api.views import TitleViewSet
+from django.core.management import BaseCommand
+from reviews.models import Comment, Review, TitleListing
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает процессорное время сериализаторов и пути через '
+        'values() для списков произведений, отзывов и комментариев'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def measure(self, build, repeat):
+        build()
+        started = time.process_time()
+        for _ in range(repeat):
+            build()
+        return (time.process_time() - started) / repeat
+
+    def handle(self, *args, **options):
+        items, repeat = options['items'], options['repeat']
+        reviews = Review.objects.select_related('author')
+        comments = Comment.objects.select_related('author')
+        cases = (
+            ('titles', TitleViewSet.queryset, TitleListing.objects,
+             TitleSerializer, TitleValuesSerializer),
+            ('reviews', reviews, reviews,
+             ReviewSerializer, ReviewValuesSerializer),
+            ('comments', comments, comments,
+             CommentSerializer, CommentValuesSerializer),
+        )
+        for name, queryset, source, serializer_class, values_class in cases:
+            page = queryset[:items]
+            rows = source.values(*values_class.get_values())[:items]
+            count = len(page)
+            if not count:
+                self.stdout.write(f'{name}: нет данных')
+                continue
+            full = self.measure(
+                lambda: serializer_class(list(page.all()), many=True).data,
+                repeat)
+            fast = self.measure(
+                lambda: values_class(list(rows.all())).data, repeat)
+            self.stdout.write(
+                f'{name}: {full / count * 1e6:.0f} мкс на объект '
+                f'через сериализатор, {fast / count * 1e6:.0f} мкс '
+                f'через values() (в {full / fast:.1f} раза быстрее)'
+            )
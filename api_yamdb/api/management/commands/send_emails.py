@@ -0,0 +1,129 @@
+import logging
+import time
+from datetime import timedelta
+
+from api.models import MAX_SEND_ATTEMPTS, OutgoingEmail
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger('api.emails')
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди'
+    claim_timeout = timedelta(minutes=10)
+    max_pause = 5 * 60
+    failures = 0
+    interval = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько писем отправлять за одно соединение'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить одну пачку и выйти'
+        )
+
+    def claim(self, batch_size):
+        """Забирает пачку писем короткой транзакцией.
+
+        Забранные письма откладываются на claim_timeout, поэтому другие
+        воркеры их не берут, а если этот воркер упадёт, письма вернутся
+        в очередь.
+        """
+        with transaction.atomic():
+            emails = list(
+                OutgoingEmail.objects.due().select_for_update(
+                    skip_locked=True)[:batch_size]
+            )
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(send_after=timezone.now() + self.claim_timeout)
+        return emails
+
+    def send_batch(self, batch_size):
+        emails = self.claim(batch_size)
+        if not emails:
+            return 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            self.failures += 1
+            self.release(emails, error)
+            return 0
+        self.failures = 0
+        try:
+            for email in emails:
+                self.send(email, connection)
+        finally:
+            connection.close()
+        return len(emails)
+
+    def send(self, email, connection):
+        try:
+            EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email,
+                [email.recipient],
+                connection=connection,
+            ).send()
+        except Exception as error:
+            self.record_failure(email, error)
+            return
+        email.sent_at = timezone.now()
+        email.save(update_fields=('sent_at',))
+
+    def release(self, emails, error):
+        """Возвращает пачку в очередь, когда почтовый сервер недоступен.
+
+        Попытка не засчитывается: письма не отправлялись, и долгий простой
+        сервера не должен исчерпать MAX_SEND_ATTEMPTS.
+        """
+        logger.warning('Почтовый сервер недоступен: %s', error)
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(
+            last_error=str(error),
+            send_after=timezone.now() + timedelta(
+                seconds=self.pause(self.interval)),
+        )
+
+    def record_failure(self, email, error):
+        email.attempts += 1
+        email.last_error = str(error)
+        email.send_after = timezone.now() + timedelta(
+            minutes=2 ** email.attempts)
+        email.save(update_fields=('attempts', 'last_error', 'send_after'))
+        if email.attempts >= MAX_SEND_ATTEMPTS:
+            logger.warning(
+                'Письмо %s для %s не отправлено за %s попыток: %s',
+                email.pk, email.recipient, email.attempts, error
+            )
+
+    def pause(self, interval):
+        """Пауза растёт, пока не удаётся подключиться к серверу."""
+        return min(interval * 2 ** self.failures, self.max_pause)
+
+    def handle(self, *args, **options):
+        self.interval = options['interval']
+        while True:
+            sent = self.send_batch(options['batch_size'])
+            if options['once']:
+                return
+            if not sent:
+                time.sleep(self.pause(self.interval))
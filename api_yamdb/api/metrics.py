@@ -0,0 +1,76 @@
+import os
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+from .middleware import QueryTimer
+
+LABELS = ('route', 'method')
+
+REQUESTS = Counter(
+    'yamdb_requests_total', 'Число запросов', LABELS + ('status',))
+LATENCY = Histogram(
+    'yamdb_request_duration_seconds', 'Время ответа', LABELS)
+RESPONSE_SIZE = Histogram(
+    'yamdb_response_size_bytes', 'Размер ответа', LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576))
+DB_QUERIES = Histogram(
+    'yamdb_db_queries', 'Число запросов к БД на один запрос', LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55))
+DB_DURATION = Histogram(
+    'yamdb_db_duration_seconds', 'Время работы с БД на один запрос', LABELS)
+
+THROTTLED = Counter(
+    'yamdb_throttled_requests_total', 'Запросов отклонено по лимиту',
+    ('scope',))
+
+DB_CONNECTIONS_OPENED = Counter(
+    'yamdb_db_connections_opened_total', 'Открыто соединений с БД', ('alias',))
+DB_CONNECTIONS_REUSED = Counter(
+    'yamdb_db_connections_reused_total',
+    'Соединений с БД переиспользовано между запросами', ('alias',))
+DB_CONNECTIONS_DISCARDED = Counter(
+    'yamdb_db_connections_discarded_total',
+    'Соединений с БД закрыто после неудачной проверки', ('alias',))
+DB_CONNECTION_CHECK = Histogram(
+    'yamdb_db_connection_check_seconds',
+    'Ожидание проверки соединения перед переиспользованием', ('alias',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        match = request.resolver_match
+        labels = (match.url_name if match else 'unmatched', request.method)
+        LATENCY.labels(*labels).observe(time.perf_counter() - started)
+        REQUESTS.labels(*labels, response.status_code).inc()
+        if not response.streaming:
+            RESPONSE_SIZE.labels(*labels).observe(len(response.content))
+        DB_QUERIES.labels(*labels).observe(queries.count)
+        DB_DURATION.labels(*labels).observe(queries.duration)
+        return response
+
+
+def metrics(request):
+    registry = REGISTRY
+    # Под gunicorn каждый воркер пишет свои файлы, собираем их вместе
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,108 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('api.timing')
+
+
+@contextmanager
+def timing_span(request, name):
+    """Добавляет время блока к спану name, если запрос замеряется."""
+    spans = getattr(request, 'timing', {}).get('spans')
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans[name] = spans.get(name, 0.0) + time.perf_counter() - started
+
+
+class QueryTimer:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class RequestTimingMiddleware:
+    """Меряет время запроса, работы с БД, view, сериализации и рендеринга.
+
+    view — обработчик DRF без сериализации ответа, serialize — вызовы
+    to_representation (см. SerializationTimingMixin), render — только
+    рендерер ответа. Замеры отдаются в заголовке Server-Timing и пишутся
+    в лог api.timing для доли запросов, заданной
+    REQUEST_TIMING_SAMPLE_RATE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        request.timing = {'spans': {}}
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        timings = {
+            'total': time.perf_counter() - started,
+            'db': queries.duration,
+        }
+        view_started = request.timing.get('view_started')
+        rendering_started = request.timing.get('rendering_started')
+        rendering_finished = request.timing.get('rendering_finished')
+        if view_started and rendering_started:
+            serialize = request.timing['spans'].get('serialize', 0.0)
+            timings['view'] = rendering_started - view_started - serialize
+            timings['serialize'] = serialize
+        if rendering_started and rendering_finished:
+            timings['render'] = rendering_finished - rendering_started
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1000:.1f}'
+            for name, duration in timings.items()
+        ) + f', queries;desc="{queries.count}"'
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'route': match.url_name if match else None,
+            'status': response.status_code,
+            'queries': queries.count,
+            **{
+                f'{name}_ms': round(duration * 1000, 1)
+                for name, duration in timings.items()
+            },
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'timing'):
+            request.timing['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        if hasattr(request, 'timing'):
+            request.timing['rendering_started'] = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: self.rendering_finished(request))
+        return response
+
+    def rendering_finished(self, request):
+        request.timing['rendering_finished'] = time.perf_counter()
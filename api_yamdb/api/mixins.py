@@ -0,0 +1,208 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.utils.cache import quote_etag
+from django.utils.functional import cached_property
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .middleware import timing_span
+
+
+class CachedListMixin:
+    """Кэширует ответы list по строке запроса и отдаёт их с ETag.
+
+    Ключи включают номер версии, который увеличивается при создании
+    и удалении объектов, поэтому старые ответы просто перестают читаться.
+    """
+    list_cache_timeout = 60 * 60
+
+    def get_list_cache_version_key(self):
+        return f'list-cache:{self.basename}:version'
+
+    def get_list_cache_version(self):
+        # Вытесненная версия заводится от текущего времени, а не с единицы,
+        # иначе снова читались бы ответы, закэшированные под старой версией
+        key = self.get_list_cache_version_key()
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), None)
+            return cache.get(key)
+        return version
+
+    def get_list_cache_key(self, request):
+        version = self.get_list_cache_version()
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f'list-cache:{self.basename}:{version}:{path}'
+
+    def invalidate_list_cache(self):
+        key = self.get_list_cache_version_key()
+        cache.add(key, time.time_ns(), None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Версию вытеснили между add и incr
+            cache.add(key, time.time_ns(), None)
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_list_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            data = super().list(request, *args, **kwargs).data
+            content = json.dumps(data, cls=JSONEncoder, sort_keys=True)
+            etag = quote_etag(hashlib.md5(content.encode()).hexdigest())
+            cache.set(key, (data, etag), self.list_cache_timeout)
+        else:
+            data, etag = cached
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.invalidate_list_cache()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate_list_cache()
+
+
+class BulkCreateMixin:
+    """Принимает в POST список объектов и создаёт их одной пачкой.
+
+    Если хотя бы один объект не прошёл проверку, ничего не создаётся,
+    а в ответе возвращаются ошибки по каждому элементу списка. Пустой
+    список отклоняется.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SerializationTimingMixin:
+    """Относит to_representation сериализаторов view к спану serialize.
+
+    serializer.data вычисляется внутри обработчика, поэтому без этого
+    сериализация ответа попадала бы в спан view.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if getattr(self.request, 'timing', None) is None:
+            return serializer
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            with timing_span(self.request, 'serialize'):
+                return to_representation(instance)
+
+        serializer.to_representation = timed_to_representation
+        return serializer
+
+
+class SparseFieldsetMixin:
+    """Ограничивает поля ответа параметром ?fields=id,name.
+
+    sparse_fields сопоставляет полю сериализатора столбцы модели:
+    только они попадают в only(), а связи через __ подключаются
+    select_related. Поля-ManyToMany загружаются prefetch_related только
+    если их запросили.
+    """
+    fields_query_param = 'fields'
+    sparse_fields = {}
+    # Столбцы, нужные всегда: внешний ключ родителя и поля пагинации
+    sparse_required_columns = ()
+
+    @cached_property
+    def requested_fields(self):
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value or self.request.method not in SAFE_METHODS:
+            return None
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in self.sparse_fields]
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param: [
+                    f'Неизвестные поля: {", ".join(unknown)}'
+                ]
+            })
+        return fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Путь через values() выбирает столбцы сам, см. ValuesListMixin
+        if self.requested_fields is None or getattr(
+            self, 'uses_values_path', False
+        ):
+            return queryset
+        columns = [*self.sparse_required_columns]
+        related = set()
+        prefetch = []
+        for name in self.requested_fields:
+            for column in self.sparse_fields[name]:
+                if '__' in column:
+                    related.add(column.rsplit('__', 1)[0])
+                    columns.append(column)
+                elif queryset.model._meta.get_field(column).many_to_many:
+                    prefetch.append(column)
+                else:
+                    columns.append(column)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.only(*columns, *related)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.requested_fields is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in set(fields) - set(self.requested_fields):
+                fields.pop(name)
+        return serializer
+
+
+class ValuesListMixin:
+    """Отдаёт list() через values() и values_serializer_class.
+
+    Ответ совпадает с обычным, но без экземпляров моделей и полей
+    ModelSerializer. Поля из ?fields= выбираются прямо в values().
+    """
+    values_serializer_class = None
+
+    @property
+    def uses_values_path(self):
+        return (
+            self.action == 'list'
+            and self.values_serializer_class is not None
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.uses_values_path:
+            return super().list(request, *args, **kwargs)
+        serializer_class = self.values_serializer_class
+        fields = getattr(self, 'requested_fields', None)
+        queryset = self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(None).values(*serializer_class.get_values(fields))
+        page = self.paginate_queryset(queryset)
+        with timing_span(request, 'serialize'):
+            data = serializer_class(
+                queryset if page is None else page, fields).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
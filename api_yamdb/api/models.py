@@ -0,0 +1,59 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+MAX_SEND_ATTEMPTS = 5
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+
+    def due(self):
+        return self.filter(
+            sent_at__isnull=True,
+            attempts__lt=MAX_SEND_ATTEMPTS,
+            send_after__lte=timezone.now(),
+        )
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(verbose_name='Отправитель')
+    recipient = models.EmailField(verbose_name='Получатель')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки в очередь'
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить не раньше'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки отправки'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ('send_after',)
+        indexes = (
+            models.Index(
+                fields=('send_after',),
+                name='outgoing_email_pending_idx',
+                condition=Q(sent_at__isnull=True)),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
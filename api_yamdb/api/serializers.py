@@ -1,17 +1,177 @@
 import datetime as dt
+import json
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q, prefetch_related_objects
 from django.shortcuts import get_object_or_404
+from django.utils.encoding import smart_str
 from rest_framework import serializers
-from rest_framework.relations import SlugRelatedField
-from rest_framework.validators import UniqueTogetherValidator
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.relations import ManyRelatedField, SlugRelatedField
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+from reviews.models import (SCORES, Category, Comment, Genre, Review, Title,
+                            score_counter_name)
 
 User = get_user_model()
 
 
+class PrefetchedSlugRelatedField(SlugRelatedField):
+    """Берёт объекты из заранее загруженного словаря, если он задан."""
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, str):
+            self.fail('invalid')
+        try:
+            return self.prefetched[data]
+        except KeyError:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Проверяет и создаёт список объектов пакетно.
+
+    Связанные объекты и занятые уникальные значения загружаются одним
+    запросом на поле для всего списка, строки вставляются bulk_create.
+    """
+    max_items = 1000
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        if not data and not self.allow_empty:
+            self.fail('empty')
+        if len(data) > self.max_items:
+            raise serializers.ValidationError(
+                f'Нельзя создать больше {self.max_items} объектов за раз'
+            )
+        items = [item for item in data if isinstance(item, dict)]
+        self.prefetch_relations(items)
+        unique = self.prefetch_unique(items)
+        ret = []
+        errors = []
+        for item in data:
+            try:
+                validated = self.child.run_validation(item)
+                self.check_unique(validated, unique)
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+            else:
+                ret.append(validated)
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return ret
+
+    def prefetch_relations(self, items):
+        for name, field in self.child.fields.items():
+            many = isinstance(field, ManyRelatedField)
+            relation = field.child_relation if many else field
+            if field.read_only or not isinstance(
+                relation, PrefetchedSlugRelatedField
+            ):
+                continue
+            values = set()
+            for item in items:
+                value = item.get(name)
+                for slug in (value if many and isinstance(value, list)
+                             else [value]):
+                    if isinstance(slug, str):
+                        values.add(slug)
+            relation.prefetched = {
+                getattr(obj, relation.slug_field): obj
+                for obj in relation.get_queryset().filter(
+                    **{f'{relation.slug_field}__in': values})
+            }
+
+    def prefetch_unique(self, items):
+        """Заменяет UniqueValidator полей одним запросом на поле."""
+        unique = {}
+        for name, field in self.child.fields.items():
+            validators = [
+                validator for validator in field.validators
+                if isinstance(validator, UniqueValidator)
+            ]
+            if not validators:
+                continue
+            field.validators = [
+                validator for validator in field.validators
+                if validator not in validators
+            ]
+            values = {
+                item[name] for item in items
+                if isinstance(item.get(name), str)
+            }
+            for validator in validators:
+                taken = set(validator.queryset.filter(
+                    **{f'{field.source}__in': values}
+                ).values_list(field.source, flat=True))
+                unique[field.source] = (taken, validator.message)
+        return unique
+
+    def check_unique(self, validated, unique):
+        errors = {}
+        for source, (taken, message) in unique.items():
+            if validated.get(source) in taken:
+                errors[source] = [message]
+        if errors:
+            raise serializers.ValidationError(errors)
+        for source, (taken, message) in unique.items():
+            taken.add(validated.get(source))
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        many_to_many = [
+            field.source for field in self.child.fields.values()
+            if isinstance(field, ManyRelatedField) and not field.read_only
+        ]
+        instances = [
+            model(**{
+                key: value for key, value in attrs.items()
+                if key not in many_to_many
+            })
+            for attrs in validated_data
+        ]
+        with transaction.atomic(using=model.objects.db):
+            if many_to_many and not self.returns_bulk_ids(model):
+                for instance in instances:
+                    instance.save()
+            else:
+                model.objects.bulk_create(instances)
+            for name in many_to_many:
+                self.create_links(model, name, instances, validated_data)
+        prefetch_related_objects(instances, *many_to_many)
+        return instances
+
+    @staticmethod
+    def returns_bulk_ids(model):
+        features = connections[model.objects.db].features
+        return features.can_return_ids_from_bulk_insert
+
+    @staticmethod
+    def create_links(model, name, instances, validated_data):
+        field = model._meta.get_field(name)
+        through = field.remote_field.through
+        links = [
+            through(**{
+                field.m2m_field_name(): instance,
+                field.m2m_reverse_field_name(): related,
+            })
+            for instance, attrs in zip(instances, validated_data)
+            for related in dict.fromkeys(attrs.get(name, ()))
+        ]
+        through.objects.bulk_create(links)
+
+
 class BasicUserSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -48,7 +208,13 @@ class FullUserSerializer(BasicUserSerializer):
 
 
 class SignupSerializer(BasicUserSerializer):
-    username = serializers.CharField()
+    """Регистрирует пользователя или находит уже существующего.
+
+    Занятость username и email проверяется одним запросом, гонку двух
+    регистраций разрешают уникальные индексы таблицы пользователей.
+    """
+    username = serializers.CharField(
+        max_length=150, validators=(UnicodeUsernameValidator(),))
     email = serializers.EmailField(max_length=254)
 
     class Meta(BasicUserSerializer.Meta):
@@ -59,16 +225,38 @@ class SignupSerializer(BasicUserSerializer):
         validators = []
 
     def validate(self, data):
-        try:
-            User.objects.get(
-                username=data.get('username'),
-                email=data.get('email')
-            )
-        except User.DoesNotExist:
-            serializer = BasicUserSerializer(data=data)
-            serializer.is_valid(raise_exception=True)
+        errors = {}
+        for user in User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        ):
+            if (user.username, user.email) == (
+                data['username'], data['email']
+            ):
+                self.instance = user
+                return data
+            for field in ('username', 'email'):
+                if getattr(user, field) == data[field]:
+                    errors[field] = [
+                        f'Пользователь с таким {field} уже существует'
+                    ]
+        if errors:
+            raise serializers.ValidationError(errors)
         return data
 
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Пользователь с таким username или email уже существует'
+                ]
+            })
+
+    def update(self, instance, validated_data):
+        return instance
+
 
 class ActivationCodeSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField()
@@ -95,6 +283,7 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Category
+        list_serializer_class = BulkListSerializer
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -102,22 +291,26 @@ class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Genre
+        list_serializer_class = BulkListSerializer
 
 
 class TitleSerializer(serializers.ModelSerializer):
-    genre = SlugRelatedField(
+    genre = PrefetchedSlugRelatedField(
         queryset=Genre.objects.all(), slug_field='slug', many=True)
-    category = SlugRelatedField(
+    category = PrefetchedSlugRelatedField(
         queryset=Category.objects.all(), slug_field='slug')
     rating = serializers.SerializerMethodField()
+    review_count = serializers.IntegerField(
+        source='rating_count', read_only=True)
 
     class Meta:
         fields = (
-            'id', 'name', 'year', 'rating',
+            'id', 'name', 'year', 'rating', 'review_count',
             'description', 'genre', 'category'
         )
         read_only_fields = ('rating',)
         model = Title
+        list_serializer_class = BulkListSerializer
 
     def validate_year(self, value):
         current_year = dt.date.today().year
@@ -128,19 +321,70 @@ class TitleSerializer(serializers.ModelSerializer):
         return value
 
     def get_rating(self, obj):
-        reviews = Review.objects.filter(title=obj.id)
-        if not reviews.exists():
+        if obj.rating_avg is None:
             return None
-        return round(reviews.aggregate(Avg('score'))['score__avg'])
+        return round(obj.rating_avg)
 
     def to_representation(self, instance):
         title = super().to_representation(instance)
-        title['genre'] = GenreSerializer(instance.genre, many=True).data
-        title['category'] = CategorySerializer(
-            instance.category, source=title).data
+        if 'genre' in title:
+            title['genre'] = GenreSerializer(
+                instance.genre.all(), many=True).data
+        if 'category' in title:
+            title['category'] = CategorySerializer(instance.category).data
         return title
 
 
+class RatingDistributionSerializer(serializers.ModelSerializer):
+    count = serializers.IntegerField(source='rating_count')
+    distribution = serializers.SerializerMethodField()
+
+    class Meta:
+        fields = ('id', 'count', 'distribution')
+        model = Title
+
+    @classmethod
+    def get_columns(cls):
+        return (
+            'id', 'rating_count',
+            *(score_counter_name(score) for score in SCORES)
+        )
+
+    def get_distribution(self, obj):
+        return {
+            str(score): count
+            for score, count in obj.score_distribution.items()
+        }
+
+
+class TitleIdsSerializer(serializers.Serializer):
+    """Список id произведений через запятую: ?ids=1,2,3."""
+    ids = serializers.CharField()
+    max_items = 100
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(item) for item in value.split(',') if item.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id произведений через запятую')
+        if not ids:
+            raise serializers.ValidationError('Укажите хотя бы один id')
+        if len(ids) > self.max_items:
+            raise serializers.ValidationError(
+                f'Не больше {self.max_items} произведений за запрос')
+        return list(dict.fromkeys(ids))
+
+
+class LeaderboardParamsSerializer(serializers.Serializer):
+    by = serializers.ChoiceField(
+        choices=('rating', 'reviews'), default='rating')
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    year = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -148,21 +392,22 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = (
+            'id', 'text', 'author', 'score', 'pub_date', 'comment_count'
+        )
+        read_only_fields = ('comment_count',)
         model = Review
 
-    def validate(self, data):
-        request = self.context['request']
-        if request.method != 'POST':
-            return data
-        title_id = self.context['view'].kwargs.get('title_id')
-        if Review.objects.filter(
-            title=title_id, author=request.user
-        ).exists():
-            raise serializers.ValidationError(
-                'Вы можете оставлять только одно ревью'
-            )
-        return data
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            # Повторный отзыв отсекает ограничение unique_review_author
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы можете оставлять только одно ревью'
+                ]
+            })
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -173,3 +418,97 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'text', 'author', 'pub_date')
         model = Comment
+
+
+class ValuesSerializer:
+    """Готовит ответ list() из словарей values() без экземпляров моделей.
+
+    fields сопоставляет полю ответа столбцы values(): по умолчанию значение
+    берётся из первого столбца, метод get_<поле> собирает его сам.
+    Ключи и значения совпадают с обычным сериализатором, в том числе
+    при ?fields=.
+    """
+    fields = {}
+    # Столбцы, нужные пагинации независимо от запрошенных полей
+    required_values = ()
+    pub_date_field = serializers.DateTimeField()
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.requested = [
+            name for name in self.fields if fields is None or name in fields
+        ]
+
+    @classmethod
+    def get_values(cls, fields=None):
+        columns = [*cls.required_values]
+        for name in cls.fields:
+            if fields is None or name in fields:
+                columns.extend(cls.fields[name])
+        return list(dict.fromkeys(columns))
+
+    @property
+    def data(self):
+        getters = [
+            (name, getattr(self, f'get_{name}', None), self.fields[name][0])
+            for name in self.requested
+        ]
+        return [
+            {
+                name: getter(row) if getter else row[column]
+                for name, getter, column in getters
+            }
+            for row in self.rows
+        ]
+
+    def get_pub_date(self, row):
+        return self.pub_date_field.to_representation(row['pub_date'])
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """Строки TitleListing в виде TitleSerializer."""
+    fields = {
+        'id': ('title_id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating_avg',),
+        'review_count': ('review_count',),
+        'description': ('description',),
+        'genre': ('genres',),
+        'category': ('category_name', 'category_slug'),
+    }
+
+    def get_rating(self, row):
+        rating = row['rating_avg']
+        return None if rating is None else round(rating)
+
+    def get_genre(self, row):
+        return json.loads(row['genres'])
+
+    def get_category(self, row):
+        if row['category_slug'] is None:
+            # Так выглядит CategorySerializer(None).data
+            return {'name': '', 'slug': ''}
+        return {'name': row['category_name'], 'slug': row['category_slug']}
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comment_count': ('comment_count',),
+    }
+    required_values = ('id', 'pub_date')
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+    required_values = ('id', 'pub_date')
@@ -0,0 +1,79 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import bump_user_generation
+from .metrics import (DB_CONNECTION_CHECK, DB_CONNECTIONS_DISCARDED,
+                      DB_CONNECTIONS_OPENED, DB_CONNECTIONS_REUSED)
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    bump_user_generation(instance.pk)
+    # До коммита параллельный запрос ещё читает из БД старые данные и
+    # может закэшировать их под новым поколением
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_user_generation(user_id))
+
+
+@receiver(connection_created)
+def count_opened_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS_OPENED.labels(connection.alias).inc()
+
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs):
+    # Устаревшие по CONN_MAX_AGE соединения к этому моменту уже закрыты
+    # обработчиком close_old_connections, подключённым раньше.
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.settings_dict.get('CONN_HEALTH_CHECKS'):
+            DB_CONNECTIONS_REUSED.labels(connection.alias).inc()
+            continue
+        # Проверка откладывается до первого обращения к БД: запросам,
+        # которые отвечают из кэша, не нужен лишний SELECT 1
+        check_before_use(connection)
+        connection.health_check_pending = True
+
+
+def check_before_use(connection):
+    """Подменяет _cursor, чтобы проверить соединение перед первым SQL.
+
+    ensure_connection не подходит: его вызывает и close_old_connections
+    в начале каждого запроса.
+    """
+    if getattr(connection, 'health_check_installed', False):
+        return
+    cursor = connection._cursor
+
+    def checked_cursor(*args, **kwargs):
+        if connection.health_check_pending:
+            connection.health_check_pending = False
+            check_connection(connection)
+        return cursor(*args, **kwargs)
+
+    connection._cursor = checked_cursor
+    connection.health_check_installed = True
+
+
+def check_connection(connection):
+    if connection.connection is None or connection.in_atomic_block:
+        return
+    started = time.perf_counter()
+    usable = connection.is_usable()
+    DB_CONNECTION_CHECK.labels(connection.alias).observe(
+        time.perf_counter() - started)
+    if usable:
+        DB_CONNECTIONS_REUSED.labels(connection.alias).inc()
+    else:
+        DB_CONNECTIONS_DISCARDED.labels(connection.alias).inc()
+        connection.close()
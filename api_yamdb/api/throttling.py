@@ -0,0 +1,102 @@
+import time
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+from .metrics import THROTTLED
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Ограничивает запросы корзиной токенов в общем кэше.
+
+    Частота «N/период» из DEFAULT_THROTTLE_RATES задаёт ёмкость корзины N,
+    которая пополняется равномерно за период. Состояние корзины хранится
+    в кэше Django, поэтому лимит общий для всех воркеров. Чтение и запись
+    корзины идут под блокировкой на cache.add, иначе параллельные запросы
+    прочитали бы один и тот же остаток.
+
+    Блокировка надёжна, только если cache.add атомарен между процессами:
+    в memcached и Redis это так, а в FileBasedCache по умолчанию add —
+    это has_key и затем set, и воркеры gunicorn изредка расходуют один
+    токен дважды. Для строгого лимита задайте CACHE_BACKEND с атомарным
+    add. Если блокировку не удалось взять, корзина обновляется без неё:
+    клиенту с токенами лучше пройти, чем получить 429 из-за соседнего
+    запроса.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+    # Блокировка истекает сама, если воркер упал, не сняв её
+    lock_timeout = 1
+    lock_attempts = 20
+    lock_wait = 0.005
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        lock = f'{self.key}:lock'
+        for _ in range(self.lock_attempts):
+            if self.cache.add(lock, 1, self.lock_timeout):
+                break
+            time.sleep(self.lock_wait)
+        else:
+            # Корзину долго держат параллельные запросы того же клиента
+            return self.take_token()
+        try:
+            return self.take_token()
+        finally:
+            self.cache.delete(lock)
+
+    def take_token(self):
+        refill = self.num_requests / self.duration
+        now = time.time()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - updated) * refill)
+        if tokens < 1:
+            return self.reject((1 - tokens) / refill)
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def reject(self, wait_time):
+        self.wait_time = wait_time
+        THROTTLED.labels(self.scope).inc()
+        return False
+
+    def wait(self):
+        return self.wait_time
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AuthThrottle(TokenBucketThrottle):
+    """Регистрация и получение токена, по IP-адресу."""
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class ReadThrottle(TokenBucketThrottle):
+    scope = 'read'
+
+    def get_cache_key(self, request, view):
+        if request.method not in SAFE_METHODS:
+            return None
+        return self.get_ident_key(request)
+
+
+class WriteThrottle(TokenBucketThrottle):
+    scope = 'write'
+
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        return self.get_ident_key(request)
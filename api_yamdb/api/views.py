@@ -1,44 +1,62 @@
+import hashlib
+import json
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from reviews import leaderboards
+from reviews.models import Category, Genre, Review, Title, TitleListing
 
 from .filters import TitlesFilter
+from .mixins import (BulkCreateMixin, CachedListMixin,
+                     SerializationTimingMixin, SparseFieldsetMixin,
+                     ValuesListMixin)
+from .models import OutgoingEmail
+from .pagination import PubDateCursorPagination
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsAuthorOrStaffOrReadOnly
 from .serializers import (ActivationCodeSerializer, BasicUserSerializer,
                           CategorySerializer, CommentSerializer,
-                          FullUserSerializer, GenreSerializer,
-                          ReviewSerializer, SignupSerializer, TitleSerializer)
+                          CommentValuesSerializer, FullUserSerializer,
+                          GenreSerializer, LeaderboardParamsSerializer,
+                          RatingDistributionSerializer, ReviewSerializer,
+                          ReviewValuesSerializer, SignupSerializer,
+                          TitleIdsSerializer, TitleSerializer,
+                          TitleValuesSerializer)
+from .throttling import AuthThrottle
 
 User = get_user_model()
 
 
 @api_view(http_method_names=['POST'])
 @permission_classes((permissions.AllowAny,))
+@throttle_classes((AuthThrottle,))
 def signup(request):
     serializer = SignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    user, _ = User.objects.get_or_create(**serializer.data)
+    user = serializer.save()
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        'Код подтверждения для входа в YaMDb',
-        f'Код подтверждения: {confirmation_code}',
-        settings.FROM_EMAIL_ADDRESS,
-        [user.email],
-        fail_silently=False,
+    OutgoingEmail.objects.create(
+        subject='Код подтверждения для входа в YaMDb',
+        body=f'Код подтверждения: {confirmation_code}',
+        from_email=settings.FROM_EMAIL_ADDRESS,
+        recipient=user.email,
     )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(http_method_names=['POST'])
 @permission_classes((permissions.AllowAny,))
+@throttle_classes((AuthThrottle,))
 def token(request):
     serializer = ActivationCodeSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -50,7 +68,7 @@ def token(request):
     )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializationTimingMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     lookup_field = 'username'
     permission_classes = (IsAdmin,)
@@ -73,14 +91,16 @@ class UserViewSet(viewsets.ModelViewSet):
         return self.partial_update(request)
 
 
-class CreateListDeleteViewSet(mixins.CreateModelMixin,
+class CreateListDeleteViewSet(SerializationTimingMixin,
+                              mixins.CreateModelMixin,
                               mixins.ListModelMixin,
                               mixins.DestroyModelMixin,
                               viewsets.GenericViewSet):
     pass
 
 
-class CategoryViewSet(CreateListDeleteViewSet):
+class CategoryViewSet(BulkCreateMixin, CachedListMixin,
+                      CreateListDeleteViewSet):
     queryset = Category.objects.all()
     lookup_field = 'slug'
     serializer_class = CategorySerializer
@@ -89,7 +109,8 @@ class CategoryViewSet(CreateListDeleteViewSet):
     search_fields = ('=name',)
 
 
-class GenreViewSet(CreateListDeleteViewSet):
+class GenreViewSet(BulkCreateMixin, CachedListMixin,
+                   CreateListDeleteViewSet):
     queryset = Genre.objects.all()
     lookup_field = 'slug'
     serializer_class = GenreSerializer
@@ -98,35 +119,162 @@ class GenreViewSet(CreateListDeleteViewSet):
     search_fields = ('=name',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(SerializationTimingMixin, BulkCreateMixin, ValuesListMixin,
+                   SparseFieldsetMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     serializer_class = TitleSerializer
+    values_serializer_class = TitleValuesSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
-    filterset_class = TitlesFilter
+    sparse_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating_avg',),
+        'review_count': ('rating_count',),
+        'description': ('description',),
+        'genre': ('genre',),
+        'category': ('category__name', 'category__slug'),
+    }
+
+    @property
+    def filterset_class(self):
+        return TitlesFilter if self.action == 'list' else None
+
+    def get_queryset(self):
+        # Список читается из готовых строк, см. TitleListing
+        if self.action == 'list':
+            return TitleListing.objects.all()
+        return super().get_queryset()
+
+    def get_distribution_queryset(self):
+        return Title.objects.only(*RatingDistributionSerializer.get_columns())
+
+    @action(
+        detail=True,
+        url_path='rating-distribution',
+        url_name='rating-distribution')
+    def rating_distribution(self, request, pk=None):
+        title = get_object_or_404(self.get_distribution_queryset(), pk=pk)
+        return Response(RatingDistributionSerializer(title).data)
+
+    @action(
+        detail=False,
+        url_path='rating-distribution',
+        url_name='rating-distributions')
+    def rating_distributions(self, request):
+        """Распределения оценок для ?ids=1,2,3 в порядке запроса."""
+        params = TitleIdsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ids = params.validated_data['ids']
+        titles = self.get_distribution_queryset().in_bulk(ids)
+        return Response(RatingDistributionSerializer(
+            [titles[pk] for pk in ids if pk in titles], many=True).data)
+
+    @action(detail=False)
+    def top(self, request):
+        """Лидерборд по байесовскому рейтингу или числу отзывов.
+
+        Рейтинг заранее посчитан в TitleListing.weighted_rating, ответы
+        кэшируются до следующего пересчёта, см. reviews.leaderboards.
+        """
+        params = LeaderboardParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+        digest = hashlib.md5(
+            json.dumps(options, sort_keys=True).encode()).hexdigest()
+        key = f'leaderboards:{leaderboards.get_version()}:{digest}'
+        data = cache.get(key)
+        if data is None:
+            queryset = TitleListing.objects.top(options['by'])
+            if 'category' in options:
+                queryset = queryset.filter(
+                    category_slug=options['category'])
+            if 'genre' in options:
+                queryset = queryset.filter(
+                    title__genre__slug=options['genre'])
+            if 'year' in options:
+                queryset = queryset.filter(year=options['year'])
+            data = TitleValuesSerializer(queryset.values(
+                *TitleValuesSerializer.get_values())[:options['limit']]).data
+            cache.set(key, data, settings.LEADERBOARD_CACHE_TIMEOUT)
+        return Response(data)
+
+    def perform_create(self, serializer):
+        # Сигналы сохранения и жанров пересобирают строку списка, здесь
+        # это делается один раз на запрос
+        with TitleListing.objects.defer_refresh():
+            super().perform_create(serializer)
+            # bulk_create не отправляет сигналов
+            if isinstance(serializer.instance, list):
+                TitleListing.objects.refresh(
+                    [title.pk for title in serializer.instance])
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class CursorPaginatedViewSet(SerializationTimingMixin, ValuesListMixin,
+                             SparseFieldsetMixin, viewsets.ModelViewSet):
+    """Переходит на курсорную пагинацию, если в запросе есть cursor."""
+
+    @property
+    def pagination_class(self):
+        cursor_param = PubDateCursorPagination.cursor_query_param
+        if cursor_param in self.request.query_params:
+            return PubDateCursorPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+
+
+class ReviewViewSet(CursorPaginatedViewSet):
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
     permission_classes = (IsAuthorOrStaffOrReadOnly,)
+    sparse_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comment_count': ('comment_count',),
+    }
+    sparse_required_columns = ('title', 'pub_date')
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.review.all()
+        title = get_object_or_404(
+            Title.objects.only('id'), id=self.kwargs.get('title_id'))
+        return title.review.select_related('author')
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Существование произведения проверяет Review.save
+        try:
+            serializer.save(
+                author=self.request.user,
+                title_id=self.kwargs.get('title_id')
+            )
+        except Title.DoesNotExist:
+            raise Http404
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(CursorPaginatedViewSet):
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
     permission_classes = (IsAuthorOrStaffOrReadOnly,)
+    sparse_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_required_columns = ('review', 'pub_date')
+
+    def get_review(self):
+        return get_object_or_404(
+            Review.objects.only('id'),
+            id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
 
     def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        return review.comment.all()
+        return self.get_review().comment.select_related('author')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
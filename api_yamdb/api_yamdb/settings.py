@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,6 +24,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,7 +64,10 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', None),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', None),
         'HOST': os.getenv('DB_HOST', None),
-        'PORT': os.getenv('DB_PORT', None)
+        'PORT': os.getenv('DB_PORT', None),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     }
 }
 
@@ -98,15 +104,41 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Ограничители запросов блокируют корзины через cache.add, который атомарен
+# между процессами только в memcached и Redis, см. api.throttling
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb_cache')
+        ),
+    }
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'api.permissions.IsAdmin',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.ReadThrottle',
+        'api.throttling.WriteThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': os.getenv('THROTTLE_AUTH_RATE', '10/min'),
+        'read': os.getenv('THROTTLE_READ_RATE', '600/min'),
+        'write': os.getenv('THROTTLE_WRITE_RATE', '60/min'),
+    },
+    # Адрес клиента — последний в X-Forwarded-For, его дописывает nginx
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
 }
 
 SIMPLE_JWT = {
@@ -116,6 +148,40 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'reviews.User'
 
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', 0.1)
+)
+
+# Размер пула потоков для Django-кода в режиме ASGI (api_yamdb.asgi)
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 10))
+
+# Лидерборды /titles/top/, см. reviews.leaderboards
+LEADERBOARD_PRIOR_VOTES = int(os.getenv('LEADERBOARD_PRIOR_VOTES', 10))
+LEADERBOARD_REFRESH_THRESHOLD = int(
+    os.getenv('LEADERBOARD_REFRESH_THRESHOLD', 100)
+)
+LEADERBOARD_CACHE_TIMEOUT = int(os.getenv('LEADERBOARD_CACHE_TIMEOUT', 300))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'api.emails': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
 FROM_EMAIL_ADDRESS = 'mail@yamdb.com'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'emails/sent_emails')
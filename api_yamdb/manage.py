@@ -5,6 +5,10 @@ import sys
 
 def main():
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    # Метрики нескольких процессов собирает только gunicorn, который сам
+    # готовит каталог (gunicorn.conf.py). Команды в том же образе пишут
+    # метрики в память процесса, иначе падают без этого каталога.
+    os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
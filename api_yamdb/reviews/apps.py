@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     name = 'reviews'
     verbose_name = 'YaMDb'
+
+    def ready(self):
+        from . import signals  # noqa: F401
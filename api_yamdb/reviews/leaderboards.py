@@ -0,0 +1,66 @@
+"""Байесовский рейтинг для /titles/top/ и версия закэшированных таблиц.
+
+Рейтинг пересчитывается пакетно командой refresh_leaderboards: раз в час
+целиком и, с ключом --pending, чаще — только если после каждых
+LEADERBOARD_REFRESH_THRESHOLD изменений отзывов пересчёт поставлен
+в очередь. Каждый пересчёт увеличивает версию, поэтому закэшированные
+ответы со старым рейтингом перестают читаться.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import TitleListing
+
+VERSION_KEY = 'leaderboards:version'
+CHANGES_KEY = 'leaderboards:changes'
+PENDING_KEY = 'leaderboards:pending'
+
+
+def get_version():
+    # Вытесненная версия заводится от текущего времени, а не с единицы,
+    # иначе снова читались бы таблицы, закэшированные под старой версией
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        return cache.get(VERSION_KEY)
+    return version
+
+
+def refresh():
+    # Изменения, пришедшие во время пересчёта, снова поставят его в очередь
+    cache.delete(PENDING_KEY)
+    TitleListing.objects.refresh_weighted_rating(
+        settings.LEADERBOARD_PRIOR_VOTES)
+    cache.add(VERSION_KEY, time.time_ns(), None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Версию вытеснили между add и incr
+        cache.add(VERSION_KEY, time.time_ns(), None)
+
+
+def is_refresh_pending():
+    return bool(cache.get(PENDING_KEY))
+
+
+def queue_refresh():
+    cache.set(PENDING_KEY, True, None)
+
+
+def note_review_changes(count=1):
+    """Ставит пересчёт в очередь после фиксации каждой порции изменений.
+
+    Пересчёт обновляет всю TitleListing, поэтому его выполняет
+    refresh_leaderboards --pending, а не запрос, пересёкший порог.
+    """
+    try:
+        changes = cache.incr(CHANGES_KEY, count)
+    except ValueError:
+        cache.set(CHANGES_KEY, count, timeout=None)
+        changes = count
+    threshold = settings.LEADERBOARD_REFRESH_THRESHOLD
+    if changes // threshold > (changes - count) // threshold:
+        transaction.on_commit(queue_refresh)
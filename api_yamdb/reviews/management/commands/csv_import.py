@@ -1,19 +1,91 @@
 import csv
 import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 from django.contrib.auth import get_user_model
-from django.core.management import BaseCommand
-from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, connections, transaction
+from reviews import leaderboards
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, TitleListing)
 
 User = get_user_model()
 
+BULK_TABLES = {
+    'users.csv': (User, 'build_user'),
+    'category.csv': (Category, 'build_category'),
+    'genre.csv': (Genre, 'build_genre'),
+    'titles.csv': (Title, 'build_title'),
+    'genre_title.csv': (TitleGenre, 'build_title_genre'),
+    'review.csv': (Review, 'build_review'),
+    'comments.csv': (Comment, 'build_comment'),
+}
+# Таблицы одного этапа не ссылаются друг на друга и грузятся параллельно
+BULK_STAGES = (
+    ('users.csv', 'category.csv', 'genre.csv'),
+    ('titles.csv',),
+    ('genre_title.csv', 'review.csv'),
+    ('comments.csv',),
+)
+
+
+def bulk_load_in_worker(options, filename):
+    command = Command()
+    command.configure(options)
+    return command.bulk_load(filename)
+
 
 class Command(BaseCommand):
     help = 'Заполняет БД данными'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default='static/data',
+            help='Каталог с CSV-файлами'
+        )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Загружать пачками через bulk_create, фиксируя каждую пачку'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Размер пачки в режиме --bulk'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Число процессов для независимых таблиц в режиме --bulk'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить прерванную загрузку с последней пачки'
+        )
+        parser.add_argument(
+            '--checkpoint-dir',
+            help='Каталог для контрольных точек, по умолчанию --data-dir'
+        )
+
+    def configure(self, options):
+        self.data_dir = options['data_dir']
+        self.checkpoint_dir = options['checkpoint_dir'] or self.data_dir
+        self.batch_size = options['batch_size']
+        self.resume = options['resume']
+        self.known_ids = {}
+
     def load_users(self):
         with io.open(
-            'static/data/users.csv',
+            os.path.join(self.data_dir, 'users.csv'),
             mode='r',
             encoding='utf-8'
         ) as f:
@@ -28,7 +100,7 @@ class Command(BaseCommand):
 
     def load_categories(self):
         with io.open(
-            'static/data/category.csv',
+            os.path.join(self.data_dir, 'category.csv'),
             mode='r',
             encoding='utf-8'
         ) as f:
@@ -41,7 +113,7 @@ class Command(BaseCommand):
 
     def load_genres(self):
         with io.open(
-            'static/data/genre.csv',
+            os.path.join(self.data_dir, 'genre.csv'),
             mode='r',
             encoding='utf-8'
         ) as f:
@@ -54,7 +126,7 @@ class Command(BaseCommand):
 
     def load_titles(self):
         with io.open(
-            'static/data/titles.csv',
+            os.path.join(self.data_dir, 'titles.csv'),
             mode='r',
             encoding='utf-8'
         ) as f:
@@ -69,7 +141,7 @@ class Command(BaseCommand):
 
     def load_title_genres(self):
         with io.open(
-            'static/data/genre_title.csv',
+            os.path.join(self.data_dir, 'genre_title.csv'),
             mode='r',
             encoding='utf-8'
         ) as f:
@@ -84,7 +156,7 @@ class Command(BaseCommand):
 
     def load_reviews(self):
         with io.open(
-            'static/data/review.csv',
+            os.path.join(self.data_dir, 'review.csv'),
             mode='r',
             encoding='utf-8'
         ) as f:
@@ -101,7 +173,7 @@ class Command(BaseCommand):
 
     def load_comments(self):
         with io.open(
-            'static/data/comments.csv',
+            os.path.join(self.data_dir, 'comments.csv'),
             mode='r',
             encoding='utf-8'
         ) as f:
@@ -115,7 +187,183 @@ class Command(BaseCommand):
                     author=author,
                 )
 
+    def read_batches(self, filename, skip=0):
+        with io.open(
+            os.path.join(self.data_dir, filename),
+            mode='r',
+            encoding='utf-8'
+        ) as f:
+            reader = islice(csv.DictReader(f, dialect='excel'), skip, None)
+            while True:
+                batch = list(islice(reader, self.batch_size))
+                if not batch:
+                    return
+                yield batch
+
+    def resolve(self, model, csv_id):
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True))
+        pk = int(csv_id)
+        if pk not in self.known_ids[model]:
+            raise CommandError(f'{model.__name__} с id={pk} не найден')
+        return pk
+
+    def build_user(self, row):
+        return User(
+            id=row['id'],
+            username=row['username'],
+            email=row['email'],
+            role=row['role'],
+        )
+
+    def build_category(self, row):
+        return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_genre(self, row):
+        return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_title(self, row):
+        return Title(
+            id=row['id'],
+            name=row['name'],
+            year=row['year'],
+            category_id=self.resolve(Category, row['category']),
+        )
+
+    def build_title_genre(self, row):
+        return TitleGenre(
+            id=row['id'],
+            genre_id=self.resolve(Genre, row['genre_id']),
+            title_id=self.resolve(Title, row['title_id']),
+        )
+
+    def build_review(self, row):
+        return Review(
+            id=row['id'],
+            title_id=self.resolve(Title, row['title']),
+            text=row['text'],
+            author_id=self.resolve(User, row['author']),
+            score=row['score'],
+        )
+
+    def build_comment(self, row):
+        return Comment(
+            id=row['id'],
+            review_id=self.resolve(Review, row['review']),
+            text=row['text'],
+            author_id=self.resolve(User, row['author']),
+        )
+
+    def checkpoint_path(self, filename):
+        return os.path.join(self.checkpoint_dir, f'{filename}.checkpoint')
+
+    def read_checkpoint(self, filename):
+        try:
+            with open(self.checkpoint_path(filename)) as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, filename, rows):
+        path = self.checkpoint_path(filename)
+        with open(f'{path}.tmp', 'w') as f:
+            f.write(str(rows))
+        os.replace(f'{path}.tmp', path)
+
+    def clear_checkpoints(self):
+        for filename in BULK_TABLES:
+            if os.path.exists(self.checkpoint_path(filename)):
+                os.remove(self.checkpoint_path(filename))
+
+    def insert_batch(self, model, objs):
+        """Вставляет пачку и возвращает число вставленных и пропущенных строк.
+
+        Строки, чей id уже есть в БД, допустимы только при --resume: их
+        записала прерванная загрузка. Иначе id из CSV указывал бы на чужую
+        строку, и ссылки из следующих таблиц разрешились бы в неё.
+        """
+        existing = set(model.objects.filter(
+            pk__in=[obj.pk for obj in objs]).values_list('pk', flat=True))
+        if existing and not self.resume:
+            raise CommandError(
+                f'{model.__name__} с id {sorted(existing)} уже есть в БД'
+            )
+        new = [obj for obj in objs if int(obj.pk) not in existing]
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(new)
+        except IntegrityError as error:
+            raise CommandError(f'{model.__name__}: {error}') from error
+        return len(new), len(existing)
+
+    def bulk_load(self, filename):
+        # Пачка могла записаться без контрольной точки, поэтому при
+        # --resume уже существующие строки пропускаются.
+        model, builder = BULK_TABLES[filename]
+        builder = getattr(self, builder)
+        skipped = self.read_checkpoint(filename) if self.resume else 0
+        started = time.monotonic()
+        read = inserted = existing = 0
+        for batch in self.read_batches(filename, skip=skipped):
+            batch_inserted, batch_existing = self.insert_batch(
+                model, [builder(row) for row in batch])
+            inserted += batch_inserted
+            existing += batch_existing
+            read += len(batch)
+            self.write_checkpoint(filename, skipped + read)
+        return skipped, inserted, existing, time.monotonic() - started
+
+    def run_stage(self, stage, options):
+        if self.workers < 2 or len(stage) < 2:
+            return [self.bulk_load(filename) for filename in stage]
+        # Дочерние процессы не должны делить соединение с родителем
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(stage)),
+            mp_context=multiprocessing.get_context('fork')
+        ) as pool:
+            return list(pool.map(
+                bulk_load_in_worker, [options] * len(stage), stage))
+
+    def handle_bulk(self, options):
+        self.workers = options['workers']
+        if self.workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write('SQLite не допускает параллельной записи, '
+                              'таблицы будут загружены по очереди')
+            self.workers = 1
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        if not self.resume:
+            self.clear_checkpoints()
+        for stage in BULK_STAGES:
+            results = self.run_stage(stage, options)
+            for filename, result in zip(stage, results):
+                skipped, inserted, existing, elapsed = result
+                self.stdout.write(
+                    f'{filename}: вставлено {inserted} строк за '
+                    f'{elapsed:.2f} с ({inserted / max(elapsed, 1e-6):.0f} '
+                    f'строк/с), уже были в БД: {existing}, '
+                    f'пропущено по контрольной точке: {skipped}'
+                )
+        with transaction.atomic():
+            Title.objects.refresh_rating()
+            Review.objects.refresh_comment_count()
+            TitleListing.objects.refresh()
+            leaderboards.refresh()
+            sequence_sql = connection.ops.sequence_reset_sql(
+                no_style(),
+                [model for model, _ in BULK_TABLES.values()]
+            )
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+        self.clear_checkpoints()
+
     def handle(self, *args, **kwargs):
+        self.configure(kwargs)
+        if kwargs['bulk']:
+            self.handle_bulk(kwargs)
+            return
         self.load_users()
         self.load_categories()
         self.load_genres()
@@ -123,3 +371,5 @@ class Command(BaseCommand):
         self.load_title_genres()
         self.load_reviews()
         self.load_comments()
+        # Связи жанров создаются без сигналов m2m_changed
+        TitleListing.objects.refresh()
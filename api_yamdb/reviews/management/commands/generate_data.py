@@ -0,0 +1,201 @@
+import datetime as dt
+import random
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews import leaderboards
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, TitleListing)
+
+User = get_user_model()
+
+WORDS = (
+    'кино', 'сюжет', 'герой', 'финал', 'сцена', 'музыка', 'роль', 'жанр',
+    'книга', 'автор', 'смысл', 'образ', 'ритм', 'история', 'драма', 'юмор',
+)
+
+
+def zipf_counts(total, buckets, exponent, cap):
+    """Раскладывает total по buckets по закону Ципфа, не больше cap в каждый.
+
+    Всё, что не поместилось в популярные корзины, делится между следующими.
+    """
+    weight_left = sum(rank ** -exponent for rank in range(1, buckets + 1))
+    for rank in range(1, buckets + 1):
+        weight = rank ** -exponent
+        count = min(cap, total, round(total * weight / weight_left))
+        total -= count
+        weight_left -= weight
+        yield count
+
+
+@contextmanager
+def explicit_pub_date(*models):
+    # auto_now_add перезаписал бы все даты текущим временем
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетические данные для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для отзывов и комментариев'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(value=Max('pk'))['value'] or 0) + 1
+
+    def insert(self, model, objects):
+        started = time.monotonic()
+        count = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            model.objects.bulk_create(batch)
+            count += len(batch)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model.__name__}: {count} строк за '
+            f'{elapsed:.2f} с ({count / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+        return count
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def pub_date(self):
+        return self.now - dt.timedelta(seconds=self.rng.randrange(10 ** 8))
+
+    def generate_users(self, first_id, count):
+        for pk in range(first_id, first_id + count):
+            yield User(
+                id=pk,
+                username=f'user{pk}',
+                email=f'user{pk}@yamdb.fake',
+                password='!',
+            )
+
+    def generate_slugged(self, model, prefix, first_id, count):
+        for pk in range(first_id, first_id + count):
+            yield model(id=pk, name=f'{prefix} {pk}', slug=f'{prefix}-{pk}')
+
+    def generate_titles(self, first_id, count, category_ids):
+        for pk in range(first_id, first_id + count):
+            yield Title(
+                id=pk,
+                name=f'Произведение {pk}',
+                year=self.rng.randint(1900, self.now.year),
+                category_id=self.rng.choice(category_ids),
+                description=self.text(20),
+            )
+
+    def generate_title_genres(self, title_ids, genre_ids):
+        for title_id in title_ids:
+            for genre_id in self.rng.sample(
+                genre_ids, self.rng.randint(1, min(3, len(genre_ids)))
+            ):
+                yield TitleGenre(title_id=title_id, genre_id=genre_id)
+
+    def generate_reviews(self, first_id, total, title_ids, user_ids):
+        # Популярность не должна совпадать с порядком id
+        titles = self.rng.sample(title_ids, len(title_ids))
+        counts = zipf_counts(total, len(titles), self.zipf, len(user_ids))
+        pk = first_id
+        for title_id, count in zip(titles, counts):
+            for author_id in self.rng.sample(user_ids, count):
+                yield Review(
+                    id=pk,
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=self.text(30),
+                    score=self.rng.randint(1, 10),
+                    pub_date=self.pub_date(),
+                )
+                pk += 1
+
+    def generate_comments(self, first_id, total, review_ids, user_ids):
+        counts = zipf_counts(total, len(review_ids), self.zipf, total)
+        pk = first_id
+        for review_id, count in zip(review_ids, counts):
+            for _ in range(count):
+                yield Comment(
+                    id=pk,
+                    review_id=review_id,
+                    author_id=self.rng.choice(user_ids),
+                    text=self.text(10),
+                    pub_date=self.pub_date(),
+                )
+                pk += 1
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.zipf = options['zipf']
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        with transaction.atomic(), explicit_pub_date(Review, Comment):
+            first = {
+                model: self.next_id(model)
+                for model in (User, Category, Genre, Title, Review, Comment)
+            }
+            users = self.insert(User, self.generate_users(
+                first[User], options['users']))
+            categories = self.insert(Category, self.generate_slugged(
+                Category, 'category', first[Category], options['categories']))
+            genres = self.insert(Genre, self.generate_slugged(
+                Genre, 'genre', first[Genre], options['genres']))
+            user_ids = list(range(first[User], first[User] + users))
+            title_ids = list(
+                range(first[Title], first[Title] + options['titles']))
+            self.insert(Title, self.generate_titles(
+                first[Title], options['titles'],
+                list(range(first[Category], first[Category] + categories))))
+            self.insert(TitleGenre, self.generate_title_genres(
+                title_ids,
+                list(range(first[Genre], first[Genre] + genres))))
+            reviews = self.insert(Review, self.generate_reviews(
+                first[Review], options['reviews'], title_ids, user_ids))
+            self.insert(Comment, self.generate_comments(
+                first[Comment],
+                options['comments'],
+                range(first[Review], first[Review] + reviews),
+                user_ids))
+            # Новые произведения идут после всех существующих, поэтому
+            # их проще отобрать по первому id, чем длинным списком в IN
+            titles = Title.objects.filter(pk__gte=first[Title])
+            titles.refresh_rating()
+            Review.objects.filter(
+                title_id__gte=first[Title]).refresh_comment_count()
+            TitleListing.objects.refresh(titles.values('pk'))
+            leaderboards.refresh()
+            sequence_sql = connection.ops.sequence_reset_sql(
+                no_style(), [User, Category, Genre, Title, Review, Comment])
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management import BaseCommand
+from reviews.models import TitleListing
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает денормализованный список произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        TitleListing.objects.refresh(batch_size=options['batch_size'])
+        self.stdout.write(
+            f'Собрано строк: {TitleListing.objects.count()} '
+            f'за {time.monotonic() - started:.2f} с'
+        )
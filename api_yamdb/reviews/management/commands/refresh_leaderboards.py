@@ -0,0 +1,27 @@
+import time
+
+from django.core.management import BaseCommand
+from reviews import leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает байесовский рейтинг произведений для /titles/top/, '
+        'запускается по расписанию'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Пересчитать, только если пересчёт поставлен в очередь '
+                 'после LEADERBOARD_REFRESH_THRESHOLD изменений отзывов'
+        )
+
+    def handle(self, *args, **options):
+        if options['pending'] and not leaderboards.is_refresh_pending():
+            return
+        started = time.monotonic()
+        leaderboards.refresh()
+        self.stdout.write(
+            f'Рейтинг пересчитан за {time.monotonic() - started:.2f} с')
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:25
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+FORWARD_SQL = (
+    """
+    CREATE TRIGGER reviews_title_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger(
+        search_vector, 'pg_catalog.russian', name, description
+    )
+    """,
+    """
+    UPDATE reviews_title SET search_vector = to_tsvector(
+        'pg_catalog.russian', name || ' ' || description
+    )
+    """,
+    """
+    CREATE INDEX reviews_title_search_vector_idx
+    ON reviews_title USING GIN (search_vector)
+    """,
+    # icontains строит UPPER(column) LIKE UPPER(%s)
+    """
+    CREATE INDEX reviews_title_name_trgm_idx
+    ON reviews_title USING GIN (UPPER(name) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX reviews_title_description_trgm_idx
+    ON reviews_title USING GIN (UPPER(description) gin_trgm_ops)
+    """,
+)
+
+BACKWARD_SQL = (
+    'DROP INDEX reviews_title_description_trgm_idx',
+    'DROP INDEX reviews_title_name_trgm_idx',
+    'DROP INDEX reviews_title_search_vector_idx',
+    'DROP TRIGGER reviews_title_search_vector_update ON reviews_title',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        TrigramExtension(),
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL),
+            run_on_postgresql(BACKWARD_SQL),
+        ),
+    ]
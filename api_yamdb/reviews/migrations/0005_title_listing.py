@@ -0,0 +1,93 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:47
+
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Фильтры списка ищут по подстроке: UPPER(column) LIKE UPPER(%s)
+FORWARD_SQL = tuple(
+    f"""
+    CREATE INDEX reviews_titlelisting_{column}_trgm_idx
+    ON reviews_titlelisting USING GIN (UPPER({column}) gin_trgm_ops)
+    """
+    for column in ('name', 'description', 'category_slug')
+)
+BACKWARD_SQL = tuple(
+    f'DROP INDEX reviews_titlelisting_{column}_trgm_idx'
+    for column in ('name', 'description', 'category_slug')
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+def fill_listing(apps, schema_editor):
+    # Копия TitleListingQuerySet.refresh на исторических моделях
+    Title = apps.get_model('reviews', 'Title')
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    TitleListing = apps.get_model('reviews', 'TitleListing')
+    rows = list(Title.objects.order_by('pk').values(
+        'pk', 'name', 'year', 'description', 'rating_avg',
+        'rating_count', 'category__name', 'category__slug'
+    ))
+    genres = {row['pk']: [] for row in rows}
+    links = TitleGenre.objects.order_by('-genre_id').values_list(
+        'title_id', 'genre__name', 'genre__slug')
+    for title_id, name, slug in links:
+        genres[title_id].append({'name': name, 'slug': slug})
+    TitleListing.objects.bulk_create((
+        TitleListing(
+            title_id=row['pk'],
+            name=row['name'],
+            year=row['year'],
+            description=row['description'],
+            rating_avg=row['rating_avg'],
+            review_count=row['rating_count'],
+            category_name=row['category__name'],
+            category_slug=row['category__slug'],
+            genres=json.dumps(genres[row['pk']], ensure_ascii=False),
+        )
+        for row in rows
+    ), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleListing',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='reviews.Title')),
+                ('name', models.CharField(max_length=200)),
+                ('year', models.PositiveSmallIntegerField(db_index=True)),
+                ('description', models.CharField(blank=True, max_length=1000)),
+                ('rating_avg', models.FloatField(null=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('category_name', models.CharField(max_length=50, null=True)),
+                ('category_slug', models.SlugField(null=True)),
+                ('genres', models.TextField(default='[]')),
+            ],
+            options={
+                'verbose_name': 'Строка списка произведений',
+                'verbose_name_plural': 'Список произведений',
+                'ordering': ('-title_id',),
+            },
+        ),
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL),
+            run_on_postgresql(BACKWARD_SQL),
+        ),
+        migrations.RunPython(fill_listing, migrations.RunPython.noop),
+    ]
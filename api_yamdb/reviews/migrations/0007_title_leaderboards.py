@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:56
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, FloatField, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+
+
+def fill_weighted_rating(apps, schema_editor):
+    # Копия TitleListingQuerySet.refresh_weighted_rating
+    Title = apps.get_model('reviews', 'Title')
+    TitleListing = apps.get_model('reviews', 'TitleListing')
+    totals = Title.objects.aggregate(
+        rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count'))
+    if not totals['rating_count']:
+        return
+    prior_votes = settings.LEADERBOARD_PRIOR_VOTES
+    mean = totals['rating_sum'] / totals['rating_count']
+    count = Cast('review_count', FloatField())
+    TitleListing.objects.update(weighted_rating=ExpressionWrapper(
+        (Coalesce('rating_avg', Value(0.0)) * count
+         + Value(prior_votes * mean))
+        / (count + Value(float(prior_votes))),
+        output_field=FloatField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_score_distribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='titlelisting',
+            name='weighted_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='titlelisting',
+            index=models.Index(fields=['-weighted_rating'], name='listing_weighted_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlelisting',
+            index=models.Index(fields=['category_slug', '-weighted_rating'], name='listing_category_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlelisting',
+            index=models.Index(fields=['year', '-weighted_rating'], name='listing_year_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlelisting',
+            index=models.Index(fields=['-review_count'], name='listing_review_count_idx'),
+        ),
+        migrations.RunPython(
+            fill_weighted_rating, migrations.RunPython.noop),
+    ]
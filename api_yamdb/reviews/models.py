@@ -1,6 +1,14 @@
+import json
+import threading
+from contextlib import contextmanager
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Avg, Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum, Value)
+from django.db.models.functions import Cast, Coalesce, NullIf
 
 
 class User(AbstractUser):
@@ -74,12 +82,95 @@ class Genre(models.Model):
         return self.name
 
 
+SCORES = range(1, 11)
+
+
+def score_counter_name(score):
+    return f'score_{score}'
+
+
+def score_counter(score):
+    return models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=f'Количество оценок {score}'
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def add_scores(self, added=None, removed=None):
+        """Атомарно учитывает новую и снятую оценки.
+
+        Сдвигает сумму и число оценок, пересчитывает среднее и меняет
+        счётчики score_1..score_10 для распределения оценок.
+        """
+        counters = {}
+        score_delta = count_delta = 0
+        for score, sign in ((added, 1), (removed, -1)):
+            if score is None:
+                continue
+            score_delta += sign * score
+            count_delta += sign
+            name = score_counter_name(score)
+            counters[name] = counters.get(name, 0) + sign
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        updated = self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating_avg=Cast(rating_sum, FloatField()) / NullIf(
+                rating_count, 0),
+            **{
+                name: F(name) + delta
+                for name, delta in counters.items() if delta
+            }
+        )
+        if updated:
+            TitleListing.objects.filter(
+                title_id__in=self.values('pk')).refresh_rating()
+        return updated
+
+    def refresh_rating(self):
+        """Пересчитывает рейтинг по отзывам, минуя счётчики."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        updated = self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(value=Sum('score')).values('value')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(value=Count('id')).values('value')),
+                0
+            ),
+            rating_avg=Subquery(
+                reviews.annotate(value=Avg('score')).values('value')),
+            **{
+                score_counter_name(score): Coalesce(
+                    Subquery(reviews.filter(score=score).annotate(
+                        value=Count('id')).values('value')),
+                    0
+                )
+                for score in SCORES
+            }
+        )
+        if updated:
+            TitleListing.objects.filter(
+                title_id__in=self.values('pk')).refresh_rating()
+        return updated
+
+
 class Title(models.Model):
     name = models.CharField(
         max_length=200,
         verbose_name='Название произведения'
     )
-    year = models.PositiveSmallIntegerField(verbose_name='Год')
+    year = models.PositiveSmallIntegerField(
+        db_index=True,
+        verbose_name='Год'
+    )
     category = models.ForeignKey(
         Category,
         null=True,
@@ -97,6 +188,36 @@ class Title(models.Model):
         blank=True,
         verbose_name='Описание произведения'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
+    rating_avg = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name='Средняя оценка'
+    )
+    # Распределение оценок, см. TitleQuerySet.add_scores
+    score_1 = score_counter(1)
+    score_2 = score_counter(2)
+    score_3 = score_counter(3)
+    score_4 = score_counter(4)
+    score_5 = score_counter(5)
+    score_6 = score_counter(6)
+    score_7 = score_counter(7)
+    score_8 = score_counter(8)
+    score_9 = score_counter(9)
+    score_10 = score_counter(10)
+    # Заполняется триггером PostgreSQL, см. миграцию 0003_title_search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
@@ -106,15 +227,232 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def score_distribution(self):
+        return {
+            score: getattr(self, score_counter_name(score))
+            for score in SCORES
+        }
+
 
 class TitleGenre(models.Model):
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'genre'), name='unique_title_genre'),
+        )
+        indexes = (
+            models.Index(
+                fields=('genre', 'title'), name='titlegenre_genre_title_idx'),
+        )
+
     def __str__(self):
         return f'title: {self.title}, genre: {self.genre}'
 
 
+# id произведений, чьи строки списка отложены defer_refresh
+_deferred_refresh = threading.local()
+
+
+class TitleListingQuerySet(models.QuerySet):
+
+    @contextmanager
+    def defer_refresh(self):
+        """Копит refresh(title_ids) внутри блока и выполняет их разом.
+
+        Так пакетное создание произведений пересобирает строки одним
+        проходом, а не по разу на каждое сохранение и сигнал.
+        """
+        if getattr(_deferred_refresh, 'title_ids', None) is not None:
+            yield
+            return
+        _deferred_refresh.title_ids = set()
+        try:
+            yield
+            title_ids = _deferred_refresh.title_ids
+        finally:
+            _deferred_refresh.title_ids = None
+        if title_ids:
+            self.refresh(title_ids)
+
+    def refresh(self, title_ids=None, batch_size=500):
+        """Пересобирает строки списка для произведений, по умолчанию всех."""
+        deferred = getattr(_deferred_refresh, 'title_ids', None)
+        if deferred is not None and title_ids is not None:
+            deferred.update(title_ids)
+            return
+        title_model = self.model._meta.get_field('title').related_model
+        through = title_model._meta.get_field('genre').remote_field.through
+        titles = title_model._default_manager.order_by('pk')
+        stale = self
+        if title_ids is not None:
+            titles = titles.filter(pk__in=title_ids)
+            stale = self.filter(title_id__in=title_ids)
+        with transaction.atomic(using=self.db):
+            # Байесовский рейтинг пересчитывается отдельно, его сохраняем
+            weighted = dict(stale.exclude(weighted_rating=0).values_list(
+                'title_id', 'weighted_rating'))
+            stale.delete()
+            last = 0
+            while True:
+                rows = list(titles.filter(pk__gt=last).values(
+                    'pk', 'name', 'year', 'description', 'rating_avg',
+                    'rating_count', 'category__name', 'category__slug'
+                )[:batch_size])
+                if not rows:
+                    return
+                last = rows[-1]['pk']
+                genres = {row['pk']: [] for row in rows}
+                # Порядок жанров как у Genre.Meta.ordering
+                links = through._default_manager.filter(
+                    title_id__in=genres
+                ).order_by('-genre_id').values_list(
+                    'title_id', 'genre__name', 'genre__slug')
+                for title_id, name, slug in links:
+                    genres[title_id].append({'name': name, 'slug': slug})
+                self.bulk_create(
+                    self.model(
+                        title_id=row['pk'],
+                        name=row['name'],
+                        year=row['year'],
+                        description=row['description'],
+                        rating_avg=row['rating_avg'],
+                        review_count=row['rating_count'],
+                        category_name=row['category__name'],
+                        category_slug=row['category__slug'],
+                        genres=json.dumps(
+                            genres[row['pk']], ensure_ascii=False),
+                        weighted_rating=weighted.get(row['pk'], 0),
+                    )
+                    for row in rows
+                )
+                if len(rows) < batch_size:
+                    return
+
+    def refresh_rating(self):
+        """Копирует рейтинг и число отзывов из произведений."""
+        titles = self.model._meta.get_field(
+            'title').related_model._default_manager.filter(
+            pk=OuterRef('title_id'))
+        return self.update(
+            rating_avg=Subquery(titles.values('rating_avg')),
+            review_count=Subquery(titles.values('rating_count')),
+        )
+
+    def refresh_weighted_rating(self, prior_votes):
+        """Пересчитывает байесовский рейтинг одним UPDATE.
+
+        WR = (v * R + m * C) / (v + m), где v и R — число оценок и средняя
+        оценка произведения, C — средняя оценка по всем отзывам,
+        m — prior_votes.
+        """
+        totals = self.model._meta.get_field(
+            'title').related_model._default_manager.aggregate(
+            rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count'))
+        if not totals['rating_count']:
+            return self.update(weighted_rating=0)
+        mean = totals['rating_sum'] / totals['rating_count']
+        count = Cast('review_count', FloatField())
+        return self.update(weighted_rating=ExpressionWrapper(
+            (Coalesce('rating_avg', Value(0.0)) * count
+             + Value(prior_votes * mean))
+            / (count + Value(float(prior_votes))),
+            output_field=FloatField()
+        ))
+
+    def top(self, by='rating'):
+        """Произведения с отзывами, лучшие по рейтингу или числу отзывов."""
+        ordering = ('-weighted_rating', '-review_count', '-title_id')
+        if by == 'reviews':
+            ordering = ('-review_count', '-weighted_rating', '-title_id')
+        return self.filter(review_count__gt=0).order_by(*ordering)
+
+
+class TitleListing(models.Model):
+    """Готовая строка списка произведений.
+
+    Поддерживается сигналами из reviews.signals и TitleQuerySet.add_scores,
+    полностью пересобирается командой rebuild_title_listing. Байесовский
+    рейтинг для лидербордов пересчитывает reviews.leaderboards.refresh.
+    """
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='listing'
+    )
+    name = models.CharField(max_length=200)
+    year = models.PositiveSmallIntegerField(db_index=True)
+    description = models.CharField(max_length=1000, blank=True)
+    rating_avg = models.FloatField(null=True)
+    review_count = models.PositiveIntegerField(default=0)
+    category_name = models.CharField(max_length=50, null=True)
+    category_slug = models.SlugField(null=True)
+    # JSON-список {"name", "slug"} жанров
+    genres = models.TextField(default='[]')
+    # Заполняется refresh_weighted_rating, 0 — ещё не посчитан
+    weighted_rating = models.FloatField(default=0)
+
+    objects = TitleListingQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Строка списка произведений'
+        verbose_name_plural = 'Список произведений'
+        ordering = ('-title_id',)
+        indexes = (
+            models.Index(
+                fields=('-weighted_rating',),
+                name='listing_weighted_rating_idx'),
+            models.Index(
+                fields=('category_slug', '-weighted_rating'),
+                name='listing_category_weighted_idx'),
+            models.Index(
+                fields=('year', '-weighted_rating'),
+                name='listing_year_weighted_idx'),
+            models.Index(
+                fields=('-review_count',),
+                name='listing_review_count_idx'),
+        )
+
+    def __str__(self):
+        return self.name
+
+
+def note_review_changes(count):
+    # leaderboards импортирует модели, поэтому импорт здесь
+    from . import leaderboards
+    leaderboards.note_review_changes(count)
+
+
+class ReviewQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Удаляет отзывы и одним проходом пересчитывает их произведения."""
+        with transaction.atomic(using=self.db):
+            title_ids = list(
+                self.order_by().values_list('title_id', flat=True).distinct())
+            deleted, counts = super().delete()
+            Title.objects.filter(pk__in=title_ids).refresh_rating()
+        reviews = counts.get(self.model._meta.label, 0)
+        if reviews:
+            note_review_changes(reviews)
+        return deleted, counts
+
+    def add_comments(self, count_delta):
+        return self.update(comment_count=F('comment_count') + count_delta)
+
+    def refresh_comment_count(self):
+        """Пересчитывает число комментариев, минуя счётчики."""
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by().values('review').annotate(
+            value=Count('id')).values('value')
+        return self.update(comment_count=Coalesce(Subquery(comments), 0))
+
+
 class Review(models.Model):
     title = models.ForeignKey(
         Title,
@@ -140,6 +478,13 @@ class Review(models.Model):
         verbose_name='Дата добавления',
         auto_now_add=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -148,11 +493,75 @@ class Review(models.Model):
             models.UniqueConstraint(
                 fields=('title', 'author'), name='unique_review_author'),
         )
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx'),
+        )
         ordering = ('-pub_date',)
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = Review.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('title_id', 'score').first()
+            if previous is not None and kwargs.get('update_fields') is None:
+                # Счётчик комментариев меняет только Comment.save, иначе
+                # здесь записалось бы устаревшее значение
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.name != 'comment_count'
+                ]
+            super().save(*args, **kwargs)
+            titles = Title.objects.filter(pk=self.title_id)
+            if previous is None:
+                # Внешний ключ проверяется только при фиксации транзакции,
+                # а обновление рейтинга сразу показывает, есть ли произведение
+                if not titles.add_scores(added=self.score):
+                    raise Title.DoesNotExist(
+                        f'Произведение {self.title_id} не найдено')
+                return
+            title_id, score = previous
+            if title_id == self.title_id:
+                if score != self.score:
+                    titles.add_scores(added=self.score, removed=score)
+                return
+            Title.objects.filter(pk=title_id).add_scores(removed=score)
+            titles.add_scores(added=self.score)
+
+    def delete(self, *args, **kwargs):
+        # Счётчики обновляются здесь, а не в post_delete: обработчики
+        # сигналов отключили бы быстрое каскадное удаление комментариев
+        with transaction.atomic():
+            # Оценка и произведение берутся из БД, как в save(): экземпляр
+            # мог устареть, а отзыв — быть уже удалён параллельным запросом
+            current = Review.objects.select_for_update().filter(
+                pk=self.pk).values_list('title_id', 'score').first()
+            if current is None:
+                return 0, {}
+            title_id, score = current
+            Title.objects.filter(pk=title_id).add_scores(removed=score)
+            note_review_changes(1)
+            return super().delete(*args, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Удаляет комментарии и пересчитывает счётчики их отзывов."""
+        with transaction.atomic(using=self.db):
+            review_ids = list(
+                self.order_by().values_list('review_id', flat=True).distinct())
+            deleted, counts = super().delete()
+            Review.objects.filter(pk__in=review_ids).refresh_comment_count()
+        return deleted, counts
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -173,10 +582,41 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx'),
+        )
         ordering = ('-pub_date',)
 
     def __str__(self):
         return self.text[:15]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = Comment.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('review_id', flat=True).first()
+            super().save(*args, **kwargs)
+            if previous == self.review_id:
+                return
+            if previous is not None:
+                Review.objects.filter(pk=previous).add_comments(-1)
+            Review.objects.filter(pk=self.review_id).add_comments(1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            review_id = Comment.objects.select_for_update().filter(
+                pk=self.pk).values_list('review_id', flat=True).first()
+            if review_id is None:
+                # Комментарий уже удалён параллельным запросом
+                return 0, {}
+            Review.objects.filter(pk=review_id).add_comments(-1)
+            return super().delete(*args, **kwargs)
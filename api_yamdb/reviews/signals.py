@@ -0,0 +1,87 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from . import leaderboards
+from .models import (Category, Comment, Genre, Review, Title, TitleGenre,
+                     TitleListing, User)
+
+
+@receiver(post_save, sender=Review)
+def count_review_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        leaderboards.note_review_changes()
+
+
+# Отзывы и комментарии сами обновляют счётчики в delete(), см. models.
+# Каскад от произведения или отзыва удаляет и сам счётчик, а каскад
+# от пользователя пересчитывается пачкой до и после удаления.
+@receiver(pre_delete, sender=User)
+def remember_authored_counters(sender, instance, **kwargs):
+    instance.reviewed_title_ids = list(Review.objects.filter(
+        author=instance).values_list('title_id', flat=True))
+    instance.commented_review_ids = list(Comment.objects.filter(
+        author=instance).order_by().values_list(
+        'review_id', flat=True).distinct())
+
+
+@receiver(post_delete, sender=User)
+def refresh_authored_counters(sender, instance, **kwargs):
+    title_ids = getattr(instance, 'reviewed_title_ids', [])
+    Title.objects.filter(pk__in=title_ids).refresh_rating()
+    Review.objects.filter(
+        pk__in=getattr(instance, 'commented_review_ids', [])
+    ).refresh_comment_count()
+    if title_ids:
+        leaderboards.note_review_changes(len(title_ids))
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_listing(sender, instance, raw=False, **kwargs):
+    if not raw:
+        TitleListing.objects.refresh([instance.pk])
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def refresh_title_genres(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            TitleListing.objects.refresh([instance.pk])
+    elif action == 'pre_clear':
+        remember_listed_titles(Genre, instance)
+    elif action == 'post_clear':
+        refresh_listed_titles(Genre, instance)
+    elif action in ('post_add', 'post_remove'):
+        TitleListing.objects.refresh(pk_set)
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_titles(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        TitleListing.objects.refresh(
+            Title.objects.filter(category=instance).values_list(
+                'pk', flat=True))
+
+
+@receiver(post_save, sender=Genre)
+def refresh_genre_titles(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        TitleListing.objects.refresh(
+            Title.objects.filter(genre=instance).values_list(
+                'pk', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def remember_listed_titles(sender, instance, **kwargs):
+    # После удаления связи с произведениями уже не найти
+    field = 'category' if sender is Category else 'genre'
+    instance.listed_title_ids = list(Title.objects.filter(
+        **{field: instance}).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def refresh_listed_titles(sender, instance, **kwargs):
+    TitleListing.objects.refresh(getattr(instance, 'listed_title_ids', []))
@@ -0,0 +1,92 @@
+import pytest
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake', password='1234567'
+    )
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUserAnother', email='another@yamdb.fake',
+        password='1234567'
+    )
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def title(category):
+    from reviews.models import Title
+    return Title.objects.create(name='Поезд', year=1895, category=category)
+
+
+@pytest.fixture
+def titles(category):
+    from reviews.models import Genre, Title
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    titles = [
+        Title.objects.create(name=f'Произведение {i}', year=2000 + i,
+                             category=category)
+        for i in range(10)
+    ]
+    for title in titles:
+        title.genre.set(genres)
+    return titles
+
+
+@pytest.fixture
+def reviews(title, django_user_model):
+    from reviews.models import Review
+    return [
+        Review.objects.create(
+            title=title,
+            author=django_user_model.objects.create_user(
+                username=f'reviewer{i}', email=f'reviewer{i}@yamdb.fake'),
+            text=f'Отзыв {i}',
+            score=i % 10 + 1,
+        )
+        for i in range(7)
+    ]
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='admin@yamdb.fake', password='1234567',
+        role='admin'
+    )
+
+
+def api_client_for(user):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+@pytest.fixture
+def admin_api_client(admin):
+    return api_client_for(admin)
+
+
+@pytest.fixture
+def user_api_client(user):
+    return api_client_for(user)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import pytest
+from api_yamdb.asgi import WsgiToAsgi, application
+
+
+def call(app, scope, body=b''):
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def http_scope(path, method='GET', query_string=b'', headers=()):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+
+
+class TestWsgiToAsgi:
+
+    def test_environ_and_response(self):
+        received = {}
+
+        def wsgi_app(environ, start_response):
+            received.update(environ)
+            received['body'] = environ['wsgi.input'].read()
+            start_response('201 Created', [('X-Test', 'ok')])
+            return [b'he', b'llo']
+
+        start, body = call(
+            WsgiToAsgi(wsgi_app, 1),
+            http_scope(
+                '/путь/', 'POST', b'a=1',
+                [(b'content-type', b'application/json'),
+                 (b'accept', b'a'), (b'accept', b'b')]
+            ),
+            b'{}'
+        )
+        assert received['REQUEST_METHOD'] == 'POST'
+        assert received['PATH_INFO'] == '/путь/'.encode().decode('latin1')
+        assert received['QUERY_STRING'] == 'a=1'
+        assert received['CONTENT_TYPE'] == 'application/json'
+        assert received['CONTENT_LENGTH'] == '2'
+        assert received['HTTP_ACCEPT'] == 'a,b'
+        assert received['body'] == b'{}'
+        assert start['status'] == 201
+        assert start['headers'] == [(b'x-test', b'ok')]
+        assert body['body'] == b'hello'
+
+    def test_lifespan(self):
+        messages = [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(WsgiToAsgi(None, 1)({'type': 'lifespan'}, receive, send))
+        assert sent == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_django_application(category):
+    start, body = call(application, http_scope('/api/v1/categories/'))
+    assert start['status'] == 200, (
+        'Проверьте, что ASGI-приложение обслуживает запросы к API'
+    )
+    assert json.loads(body['body'])['results'][0]['slug'] == category.slug
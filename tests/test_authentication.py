@@ -0,0 +1,49 @@
+import pytest
+from api.authentication import CachedJWTAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    url = '/api/v1/users/me/'
+
+    def test_user_is_cached(self, user_api_client, user,
+                            django_assert_num_queries):
+        user_api_client.get(self.url)
+        # Остаётся только выборка профиля в retrieve
+        with django_assert_num_queries(1):
+            response = user_api_client.get(self.url)
+        assert response.json()['username'] == user.username
+
+    def test_cache_is_dropped_on_change(self, user_api_client,
+                                        admin_api_client, user):
+        assert user_api_client.get('/api/v1/users/').status_code == 403
+        admin_api_client.patch(
+            f'/api/v1/users/{user.username}/', {'role': 'admin'})
+        assert user_api_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли сбрасывает кэш пользователя'
+        )
+
+    def test_change_during_cache_fill(self, user, monkeypatch):
+        token = AccessToken.for_user(user)
+        load_user = JWTAuthentication.get_user
+
+        def load_then_change(self, validated_token):
+            try:
+                return load_user(self, validated_token)
+            finally:
+                # Пользователя заблокировали, пока запрос не успел
+                # закэшировать прочитанную из БД запись
+                user.is_active = False
+                user.save()
+
+        monkeypatch.setattr(JWTAuthentication, 'get_user', load_then_change)
+        assert CachedJWTAuthentication().get_user(token).is_active
+        monkeypatch.undo()
+
+        with pytest.raises(AuthenticationFailed):
+            # Запись, прочитанная до изменения, не должна попасть в кэш
+            # для следующих запросов
+            CachedJWTAuthentication().get_user(token)
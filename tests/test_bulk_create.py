@@ -0,0 +1,134 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestBulkCreate:
+
+    def test_categories(self, admin_api_client, category,
+                        django_assert_num_queries):
+        admin_api_client.get('/api/v1/categories/')
+        payload = [
+            {'name': f'Категория {i}', 'slug': f'category-{i}'}
+            for i in range(20)
+        ]
+        # занятые slug, вставка пачкой внутри точки сохранения
+        with django_assert_num_queries(4):
+            response = admin_api_client.post(
+                '/api/v1/categories/', payload, format='json')
+        assert response.status_code == 201
+        assert response.json() == payload
+        assert admin_api_client.get(
+            '/api/v1/categories/').json()['count'] == 21, (
+            'Проверьте, что пакетное создание сбрасывает кэш списка'
+        )
+
+    def test_titles(self, admin_api_client, titles):
+        admin_api_client.get('/api/v1/genres/')
+        payload = [
+            {
+                'name': f'Новое {i}',
+                'year': 2001,
+                'genre': ['genre-0', 'genre-1'],
+                'category': 'movie',
+            }
+            for i in range(10)
+        ]
+        response = admin_api_client.post(
+            '/api/v1/titles/', payload, format='json')
+        assert response.status_code == 201
+        data = response.json()
+        assert [title['name'] for title in data] == [
+            title['name'] for title in payload
+        ]
+        assert sorted(genre['slug'] for genre in data[0]['genre']) == [
+            'genre-0', 'genre-1'
+        ]
+        detail = admin_api_client.get(f'/api/v1/titles/{data[5]["id"]}/')
+        assert detail.json() == data[5]
+
+    def test_title_relations_resolved_in_batch(self, admin_api_client,
+                                               titles):
+        admin_api_client.get('/api/v1/genres/')
+        payload = [
+            {'name': f'Новое {i}', 'year': 2001,
+             'genre': ['genre-0', 'genre-1', 'genre-2'],
+             'category': 'movie'}
+            for i in range(30)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = admin_api_client.post(
+                '/api/v1/titles/', payload, format='json')
+        assert response.status_code == 201
+        # Без id из bulk_create (SQLite) произведения вставляются по одному,
+        # а строки списка всё равно собираются одним проходом
+        assert len(context.captured_queries) <= len(payload) + 15, (
+            'Проверьте, что строки списка не пересобираются на каждое '
+            'произведение'
+        )
+        # Жанры и категория всего списка загружаются одним запросом каждая
+        for column in ('"reviews_genre"."slug" IN',
+                       '"reviews_category"."slug" IN'):
+            lookups = [
+                query for query in context.captured_queries
+                if column in query['sql']
+            ]
+            assert len(lookups) == 1, (
+                'Проверьте, что связанные объекты загружаются пакетно'
+            )
+
+    def test_errors_per_item(self, admin_api_client, titles):
+        payload = [
+            {'name': 'Хорошее', 'year': 2001, 'genre': ['genre-0'],
+             'category': 'movie'},
+            {'name': 'Без жанра', 'year': 2001, 'genre': ['unknown'],
+             'category': 'movie'},
+            {'name': 'Из будущего', 'year': 3000, 'genre': ['genre-0'],
+             'category': 'movie'},
+        ]
+        response = admin_api_client.post(
+            '/api/v1/titles/', payload, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert list(errors[1]) == ['genre']
+        assert list(errors[2]) == ['year']
+        assert admin_api_client.get(
+            '/api/v1/titles/').json()['count'] == len(titles), (
+            'Проверьте, что при ошибках ничего не создаётся'
+        )
+
+    def test_duplicate_slugs(self, admin_api_client, category):
+        payload = [
+            {'name': 'Фильм', 'slug': 'movie'},
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Ещё книга', 'slug': 'book'},
+        ]
+        response = admin_api_client.post(
+            '/api/v1/categories/', payload, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert list(errors[0]) == ['slug']
+        assert errors[1] == {}
+        assert list(errors[2]) == ['slug']
+
+    def test_empty_list(self, admin_api_client):
+        response = admin_api_client.post(
+            '/api/v1/genres/', [], format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что пустой список отклоняется'
+        )
+        assert response.json() == ['Этот список не может быть пустым.']
+
+    def test_single_object_still_supported(self, admin_api_client):
+        response = admin_api_client.post(
+            '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == 201
+        assert response.json() == {'name': 'Драма', 'slug': 'drama'}
+
+    def test_forbidden_for_user(self, user_api_client):
+        response = user_api_client.post(
+            '/api/v1/genres/', [{'name': 'Драма', 'slug': 'drama'}],
+            format='json')
+        assert response.status_code == 403
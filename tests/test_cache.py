@@ -0,0 +1,43 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.mark.django_db
+class TestCategoryListCache:
+    url = '/api/v1/categories/'
+
+    def test_list_is_cached(self, client, category,
+                            django_assert_num_queries):
+        first = client.get(self.url, {'search': 'Фильм'})
+        with django_assert_num_queries(0):
+            second = client.get(self.url, {'search': 'Фильм'})
+        assert second.json() == first.json()
+        assert second['ETag'] == first['ETag']
+
+    def test_not_modified(self, client, category):
+        etag = client.get(self.url)['ETag']
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_create_and_delete_invalidate(self, client, admin_api_client,
+                                          category):
+        assert client.get(self.url).json()['count'] == 1
+        admin_api_client.post(self.url, {'name': 'Книга', 'slug': 'book'})
+        assert client.get(self.url).json()['count'] == 2, (
+            'Проверьте, что создание категории сбрасывает кэш списка'
+        )
+        admin_api_client.delete(f'{self.url}book/')
+        assert client.get(self.url).json()['count'] == 1, (
+            'Проверьте, что удаление категории сбрасывает кэш списка'
+        )
+
+    def test_evicted_version_does_not_revive_old_entries(
+        self, client, admin_api_client, category
+    ):
+        assert client.get(self.url).json()['count'] == 1
+        admin_api_client.post(self.url, {'name': 'Книга', 'slug': 'book'})
+        cache.delete('list-cache:categories:version')
+        assert client.get(self.url).json()['count'] == 2, (
+            'Проверьте, что после вытеснения версии не читаются ответы, '
+            'закэшированные под старыми версиями'
+        )
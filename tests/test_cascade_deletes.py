@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+
+
+@pytest.fixture
+def discussed(titles, django_user_model):
+    """Отзыв каждого автора на каждое из трёх произведений, к каждому
+    отзыву по комментарию от каждого автора."""
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'critic{i}', email=f'critic{i}@yamdb.fake')
+        for i in range(8)
+    ]
+    for title in titles[:3]:
+        for score, author in enumerate(authors, 1):
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score)
+            Comment.objects.bulk_create(
+                Comment(review=review, author=commenter, text='Комментарий')
+                for commenter in authors
+            )
+    Review.objects.refresh_comment_count()
+    return authors
+
+
+def queries_of(action):
+    with CaptureQueriesContext(connection) as context:
+        action()
+    return len(context.captured_queries)
+
+
+def counters(title):
+    return Title.objects.values_list(
+        'rating_sum', 'rating_count', 'score_1').get(pk=title.pk)
+
+
+@pytest.mark.django_db
+class TestCascadeDeletes:
+
+    def test_title_delete(self, titles, discussed):
+        # 8 отзывов и 64 комментария удаляются пачками, без запроса
+        # на каждую удалённую строку
+        assert queries_of(titles[0].delete) <= 8
+        assert not Comment.objects.filter(review__title=titles[0]).exists()
+
+    def test_review_delete(self, titles, discussed):
+        review = Review.objects.filter(title=titles[0]).first()
+        assert queries_of(review.delete) <= 7
+        assert counters(titles[0])[1] == 7
+
+    def test_user_delete(self, titles, discussed):
+        author = discussed[0]
+        assert queries_of(author.delete) <= 15, (
+            'Проверьте, что счётчики пересчитываются пачкой, а не '
+            'запросом на каждый удалённый отзыв и комментарий'
+        )
+        for title in titles[:3]:
+            assert counters(title) == (sum(range(2, 9)), 7, 0)
+        assert set(Review.objects.values_list(
+            'comment_count', flat=True)) == {7}
+
+    def test_queryset_deletes(self, titles, discussed):
+        Review.objects.filter(title=titles[0], score__lte=4).delete()
+        assert counters(titles[0]) == (sum(range(5, 9)), 4, 0)
+        review = Review.objects.filter(title=titles[1]).first()
+        Comment.objects.filter(
+            review=review, author__in=discussed[:3]).delete()
+        review.refresh_from_db()
+        assert review.comment_count == 5
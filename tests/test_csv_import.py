@@ -0,0 +1,187 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from reviews.management.commands.csv_import import Command
+from reviews.models import (Category, Comment, Review, Title, TitleGenre,
+                            TitleListing)
+
+User = get_user_model()
+
+USERS = range(101, 105)
+TITLES = range(1, 7)
+
+
+def score(user_id, title_id):
+    return (user_id + title_id) % 10 + 1
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Каталог с CSV: 4 пользователя, 6 произведений, 20 отзывов."""
+    write_csv(tmp_path / 'users.csv', ('id', 'username', 'email', 'role'), [
+        (pk, f'csv{pk}', f'csv{pk}@yamdb.fake', 'user') for pk in USERS
+    ])
+    write_csv(tmp_path / 'category.csv', ('id', 'name', 'slug'), [
+        (1, 'Фильм', 'film'), (2, 'Книга', 'book'),
+    ])
+    write_csv(tmp_path / 'genre.csv', ('id', 'name', 'slug'), [
+        (1, 'Драма', 'drama'), (2, 'Комедия', 'comedy'),
+    ])
+    write_csv(tmp_path / 'titles.csv', ('id', 'name', 'year', 'category'), [
+        (pk, f'Произведение {pk}', 1990 + pk, pk % 2 + 1) for pk in TITLES
+    ])
+    write_csv(tmp_path / 'genre_title.csv', ('id', 'title_id', 'genre_id'), [
+        (pk, pk, pk % 2 + 1) for pk in TITLES
+    ])
+    reviews = [
+        (title_id, user_id) for title_id in TITLES[:5] for user_id in USERS
+    ]
+    write_csv(
+        tmp_path / 'review.csv',
+        ('id', 'title', 'text', 'author', 'score'),
+        [
+            (pk, title_id, 'Отзыв', user_id, score(user_id, title_id))
+            for pk, (title_id, user_id) in enumerate(reviews, start=1)
+        ]
+    )
+    write_csv(tmp_path / 'comments.csv', ('id', 'review', 'text', 'author'), [
+        (pk, (pk - 1) // 2 + 1, 'Комментарий', USERS[pk % len(USERS)])
+        for pk in range(1, 2 * len(reviews) + 1)
+    ])
+    return tmp_path
+
+
+def csv_import(data_dir, *args):
+    out = StringIO()
+    call_command(
+        'csv_import', '--bulk', '--data-dir', str(data_dir),
+        '--batch-size', '3', *args, stdout=out
+    )
+    return out.getvalue()
+
+
+def assert_imported():
+    assert User.objects.filter(pk__in=USERS).count() == len(USERS)
+    assert Title.objects.count() == len(TITLES)
+    assert TitleGenre.objects.count() == len(TITLES)
+    assert Review.objects.count() == 20
+    assert Comment.objects.count() == 40
+    for title in Title.objects.all():
+        scores = [score(user_id, title.pk) for user_id in USERS]
+        if title.pk not in TITLES[:5]:
+            scores = []
+        assert (title.rating_sum, title.rating_count) == (
+            sum(scores), len(scores)
+        ), 'Проверьте, что рейтинги пересчитаны после загрузки'
+    assert set(
+        Review.objects.values_list('comment_count', flat=True)) == {2}, (
+        'Проверьте, что счётчики комментариев пересчитаны после загрузки'
+    )
+
+
+@pytest.mark.django_db
+class TestCsvImport:
+
+    def test_data_dir(self, data_dir):
+        output = csv_import(data_dir)
+        assert_imported()
+        assert 'review.csv: вставлено 20 строк' in output
+        assert not list(data_dir.glob('*.checkpoint')), (
+            'Проверьте, что контрольные точки удаляются после загрузки'
+        )
+
+    def test_bulk_counters_and_sequences(self, data_dir, user):
+        csv_import(data_dir)
+        assert_imported()
+        for title in Title.objects.all():
+            scores = [score(user_id, title.pk) for user_id in USERS]
+            if title.pk not in TITLES[:5]:
+                assert title.rating_avg is None
+                continue
+            assert title.rating_avg == pytest.approx(
+                sum(scores) / len(scores))
+            assert title.score_distribution == {
+                value: scores.count(value) for value in range(1, 11)
+            }, 'Проверьте, что распределение оценок пересчитано'
+        listing = {
+            row.title_id: row for row in TitleListing.objects.all()
+        }
+        assert set(listing) == set(TITLES), (
+            'Проверьте, что строки списка произведений собраны после загрузки'
+        )
+        for title in Title.objects.select_related('category'):
+            row = listing[title.pk]
+            assert row.rating_avg == title.rating_avg
+            assert row.review_count == title.rating_count
+            assert row.category_slug == title.category.slug
+
+        # Следующие id выдаются после загруженных из CSV
+        category = Category.objects.create(name='Музыка', slug='music')
+        title = Title.objects.create(name='Новое', year=2020)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5)
+        comment = Comment.objects.create(
+            review=review, author=user, text='Комментарий')
+        assert category.pk > 2
+        assert title.pk > max(TITLES)
+        assert review.pk > 20
+        assert comment.pk > 40
+
+    def test_resume_after_interrupt(self, data_dir, monkeypatch):
+        write_checkpoint = Command.write_checkpoint
+        written = []
+
+        def interrupt(self, filename, rows):
+            # Третья пачка отзывов записана, а контрольная точка — нет
+            if filename == 'review.csv' and len(written) == 2:
+                raise KeyboardInterrupt
+            if filename == 'review.csv':
+                written.append(rows)
+            write_checkpoint(self, filename, rows)
+
+        monkeypatch.setattr(Command, 'write_checkpoint', interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            csv_import(data_dir)
+        assert Review.objects.count() == 9
+        assert (data_dir / 'review.csv.checkpoint').read_text() == '6'
+        monkeypatch.undo()
+
+        output = csv_import(data_dir, '--resume')
+        assert_imported()
+        assert (
+            'review.csv: вставлено 11 строк' in output
+            and 'уже были в БД: 3, пропущено по контрольной точке: 6'
+            in output
+        ), 'Проверьте, что отчёт считает реально вставленные строки'
+
+    def test_existing_id_is_not_reused(self, data_dir, django_user_model):
+        django_user_model.objects.create_user(
+            id=USERS[0], username='admin', email='admin@yamdb.fake')
+        with pytest.raises(CommandError, match=r'User с id \[101\]'):
+            csv_import(data_dir)
+        assert not Review.objects.exists(), (
+            'Проверьте, что строки с занятым id не пропускаются молча: '
+            'отзывы не должны достаться другому пользователю'
+        )
+
+    def test_unique_conflict(self, data_dir, django_user_model):
+        django_user_model.objects.create_user(
+            username=f'csv{USERS[0]}', email='other@yamdb.fake')
+        with pytest.raises(CommandError, match='User'):
+            csv_import(data_dir)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_workers(data_dir):
+    csv_import(data_dir, '--workers', '2')
+    assert_imported()
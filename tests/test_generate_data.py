@@ -0,0 +1,94 @@
+import datetime as dt
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.utils import timezone
+from reviews.management.commands.generate_data import Command
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, TitleListing)
+
+User = get_user_model()
+
+NOW = dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def generate_data(seed=7):
+    call_command(
+        'generate_data', '--users', '20', '--categories', '3',
+        '--genres', '5', '--titles', '30', '--reviews', '100',
+        '--comments', '150', '--batch-size', '40', '--seed', str(seed),
+        stdout=StringIO()
+    )
+
+
+def snapshot():
+    return (
+        list(Title.objects.order_by('pk').values_list(
+            'pk', 'year', 'category_id', 'description')),
+        list(TitleGenre.objects.order_by('title_id', 'genre_id').values_list(
+            'title_id', 'genre_id')),
+        list(Review.objects.order_by('pk').values_list(
+            'pk', 'title_id', 'author_id', 'score', 'pub_date')),
+        list(Comment.objects.order_by('pk').values_list(
+            'pk', 'review_id', 'author_id', 'pub_date')),
+    )
+
+
+@pytest.mark.django_db
+class TestGenerateData:
+
+    @pytest.fixture(autouse=True)
+    def frozen_now(self, monkeypatch):
+        monkeypatch.setattr(timezone, 'now', lambda: NOW)
+
+    def test_seed_is_deterministic(self):
+        generate_data()
+        first = snapshot()
+        for model in (Title, Category, Genre, User):
+            model.objects.all().delete()
+        generate_data()
+        assert snapshot() == first, (
+            'Проверьте, что одно и то же зерно даёт одинаковые данные'
+        )
+
+    def test_counters(self):
+        generate_data()
+        assert Review.objects.count() == 100
+        assert Comment.objects.count() == 150
+        pub_dates = set(
+            Review.objects.values_list('pub_date', flat=True)
+        ) | set(Comment.objects.values_list('pub_date', flat=True))
+        assert len(pub_dates) > 200 and max(pub_dates) < NOW, (
+            'Проверьте, что даты публикации берутся из генератора, '
+            'а не из auto_now_add'
+        )
+        for pub_date_field in (
+            Review._meta.get_field('pub_date'),
+            Comment._meta.get_field('pub_date'),
+        ):
+            assert pub_date_field.auto_now_add
+        for title in Title.objects.annotate(
+            score_sum=Sum('review__score'), score_count=Count('review')
+        ):
+            assert (title.rating_sum, title.rating_count) == (
+                title.score_sum or 0, title.score_count
+            ), 'Проверьте, что рейтинги пересчитаны после генерации'
+        for review in Review.objects.annotate(total=Count('comment')):
+            assert review.comment_count == review.total
+        assert TitleListing.objects.count() == 30
+
+    def test_auto_now_add_restored_after_error(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError
+            yield
+
+        monkeypatch.setattr(Command, 'generate_comments', fail)
+        with pytest.raises(RuntimeError):
+            generate_data()
+        assert Review._meta.get_field('pub_date').auto_now_add, (
+            'Проверьте, что auto_now_add возвращается и после ошибки'
+        )
+        assert not Review.objects.exists()
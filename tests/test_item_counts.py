@@ -0,0 +1,89 @@
+import pytest
+from reviews.models import Comment, Review
+
+
+def review_url(title, review=None):
+    url = f'/api/v1/titles/{title.id}/reviews/'
+    return url if review is None else f'{url}{review.id}/'
+
+
+def comment_count(client, title, review):
+    return client.get(review_url(title, review)).json()['comment_count']
+
+
+@pytest.mark.django_db
+class TestReviewCount:
+
+    def test_title_outputs(self, client, title, reviews):
+        detail = client.get(f'/api/v1/titles/{title.id}/').json()
+        listed = client.get('/api/v1/titles/').json()['results'][0]
+        top = client.get('/api/v1/titles/top/', {'by': 'reviews'}).json()
+        assert detail['review_count'] == listed['review_count'] == 7
+        assert top == [listed]
+        reviews[0].delete()
+        assert client.get(
+            '/api/v1/titles/').json()['results'][0]['review_count'] == 6, (
+            'Проверьте, что число отзывов в списке следует за отзывами'
+        )
+
+    def test_sparse(self, client, title, reviews):
+        results = client.get(
+            '/api/v1/titles/', {'fields': 'id,review_count'}
+        ).json()['results']
+        assert results == [{'id': title.id, 'review_count': 7}]
+        detail = client.get(
+            f'/api/v1/titles/{title.id}/', {'fields': 'review_count'}).json()
+        assert detail == {'review_count': 7}
+
+
+@pytest.mark.django_db
+class TestCommentCount:
+
+    def test_counter_follows_comments(self, client, user_api_client, user,
+                                      title, reviews):
+        url = f'{review_url(title, reviews[0])}comments/'
+        ids = [
+            user_api_client.post(url, {'text': 'Комментарий'}).json()['id']
+            for _ in range(3)
+        ]
+        assert comment_count(client, title, reviews[0]) == 3
+        user_api_client.delete(f'{url}{ids[0]}/')
+        assert comment_count(client, title, reviews[0]) == 2
+        comment = Comment.objects.get(pk=ids[1])
+        comment.review = reviews[1]
+        comment.save()
+        assert comment_count(client, title, reviews[0]) == 1
+        assert comment_count(client, title, reviews[1]) == 1
+        user.delete()
+        assert comment_count(client, title, reviews[0]) == 0, (
+            'Проверьте, что счётчик уменьшается при каскадном удалении'
+        )
+
+    def test_review_update_keeps_counter(self, client, title, reviews, user):
+        stale = Review.objects.get(pk=reviews[0].pk)
+        Comment.objects.create(review=reviews[0], author=user, text='Раз')
+        stale.text = 'Исправленный отзыв'
+        stale.save()
+        assert comment_count(client, title, reviews[0]) == 1, (
+            'Проверьте, что изменение отзыва не затирает счётчик'
+        )
+
+    def test_refresh(self, client, title, reviews, user):
+        Comment.objects.create(review=reviews[0], author=user, text='Раз')
+        Review.objects.update(comment_count=5)
+        Review.objects.refresh_comment_count()
+        assert comment_count(client, title, reviews[0]) == 1
+        assert comment_count(client, title, reviews[1]) == 0
+
+    @pytest.mark.parametrize('fast', (True, False))
+    def test_no_query_per_review(self, client, title, reviews, user, fast,
+                                 monkeypatch, django_assert_num_queries):
+        from api.views import ReviewViewSet
+        if not fast:
+            monkeypatch.setattr(ReviewViewSet, 'values_serializer_class', None)
+        for review in reviews:
+            Comment.objects.create(review=review, author=user, text='Раз')
+        # произведение, COUNT и страница отзывов
+        with django_assert_num_queries(3):
+            results = client.get(review_url(title)).json()['results']
+        assert {review['comment_count'] for review in results} == {1}
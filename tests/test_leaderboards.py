@@ -0,0 +1,132 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from reviews import leaderboards
+from reviews.models import Review, TitleListing
+
+
+@pytest.fixture
+def scored(titles, django_user_model, settings):
+    settings.LEADERBOARD_PRIOR_VOTES = 2
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'critic{i}', email=f'critic{i}@yamdb.fake')
+        for i in range(4)
+    ]
+    for title, scores in zip(titles, ((10,), (9, 9, 9, 9), (2, 2, 2))):
+        for author, score in zip(authors, scores):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score)
+    leaderboards.refresh()
+    return titles
+
+
+def top_ids(client, **params):
+    response = client.get('/api/v1/titles/top/', params)
+    assert response.status_code == 200
+    return [title['id'] for title in response.json()]
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def test_bayesian_rating(self, client, scored):
+        # C = 52 / 8 = 6.5, WR = (v * R + 2 * C) / (v + 2)
+        weighted = dict(TitleListing.objects.values_list(
+            'title_id', 'weighted_rating'))
+        assert weighted[scored[0].id] == pytest.approx(23 / 3)
+        assert weighted[scored[1].id] == pytest.approx(49 / 6)
+        assert weighted[scored[2].id] == pytest.approx(19 / 5)
+        assert top_ids(client) == [
+            scored[1].id, scored[0].id, scored[2].id
+        ], (
+            'Проверьте, что одна высокая оценка не поднимает произведение '
+            'выше многих чуть более низких'
+        )
+
+    def test_order_and_filters(self, client, scored):
+        assert top_ids(client, by='reviews') == [
+            scored[1].id, scored[2].id, scored[0].id
+        ]
+        assert top_ids(client, limit=1) == [scored[1].id]
+        assert top_ids(client, year=2000) == [scored[0].id]
+        assert top_ids(client, category='movie', genre='genre-1') == [
+            scored[1].id, scored[0].id, scored[2].id
+        ]
+        assert top_ids(client, category='book') == []
+        scored[1].genre.clear()
+        assert scored[1].id not in top_ids(client, genre='genre-1', limit=5)
+
+    def test_same_rows_as_list(self, client, scored):
+        top = client.get('/api/v1/titles/top/').json()
+        # у каждого произведения из фикстуры свой год
+        listed = [
+            client.get(
+                '/api/v1/titles/', {'year': title['year']}
+            ).json()['results'][0]
+            for title in top
+        ]
+        assert top == listed, (
+            'Проверьте, что лидерборд отдаёт произведения как список'
+        )
+
+    def test_cached_until_refresh(self, client, scored, user, another_user):
+        assert top_ids(client, by='reviews')[0] == scored[1].id
+        for author in (user, another_user):
+            Review.objects.create(
+                title=scored[2], author=author, text='Отзыв', score=1)
+        assert top_ids(client, by='reviews')[0] == scored[1].id, (
+            'Проверьте, что лидерборд отдаётся из кэша'
+        )
+        leaderboards.refresh()
+        assert top_ids(client, by='reviews')[0] == scored[2].id
+
+    def test_evicted_version_does_not_revive_old_tables(
+        self, client, scored, user, another_user
+    ):
+        assert top_ids(client, by='reviews')[0] == scored[1].id
+        for author in (user, another_user):
+            Review.objects.create(
+                title=scored[2], author=author, text='Отзыв', score=1)
+        leaderboards.refresh()
+        cache.delete(leaderboards.VERSION_KEY)
+        assert top_ids(client, by='reviews')[0] == scored[2].id, (
+            'Проверьте, что после вытеснения версии не читаются таблицы, '
+            'закэшированные под старыми версиями'
+        )
+
+    def test_title_update_keeps_rating(self, scored, admin_api_client):
+        listing = TitleListing.objects.get(title=scored[1])
+        admin_api_client.patch(
+            f'/api/v1/titles/{scored[1].id}/', {'name': 'Новое имя'})
+        assert TitleListing.objects.get(
+            title=scored[1]).weighted_rating == listing.weighted_rating
+
+    @pytest.mark.parametrize('params', (
+        {'limit': 0}, {'limit': 101}, {'by': 'name'}, {'year': 'x'},
+    ))
+    def test_validation(self, client, params):
+        response = client.get('/api/v1/titles/top/', params)
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_refresh_after_threshold(title, user, another_user, settings):
+    settings.LEADERBOARD_REFRESH_THRESHOLD = 2
+    Review.objects.create(title=title, author=user, text='Отзыв', score=8)
+    call_command('refresh_leaderboards', '--pending')
+    listing = TitleListing.objects.get(title=title)
+    assert listing.weighted_rating == 0
+    Review.objects.create(
+        title=title, author=another_user, text='Отзыв', score=6)
+    listing.refresh_from_db()
+    assert listing.weighted_rating == 0, (
+        'Проверьте, что запрос, пересёкший порог, не пересчитывает рейтинг'
+    )
+    assert leaderboards.is_refresh_pending()
+    call_command('refresh_leaderboards', '--pending')
+    listing.refresh_from_db()
+    assert listing.weighted_rating == pytest.approx(7), (
+        'Проверьте, что рейтинг пересчитывается после порога изменений'
+    )
+    assert not leaderboards.is_refresh_pending()
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+from os.path import dirname, join
+
+MANAGE_PY = join(dirname(dirname(os.path.abspath(__file__))),
+                 'api_yamdb', 'manage.py')
+
+
+def run_command(env, *args):
+    return subprocess.run(
+        [sys.executable, MANAGE_PY, *args], env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        universal_newlines=True, timeout=120)
+
+
+def test_commands_run_without_metrics_dir(tmp_path):
+    metrics_dir = tmp_path / 'prometheus'
+    env = dict(
+        os.environ,
+        DB_ENGINE='django.db.backends.sqlite3',
+        DB_NAME=str(tmp_path / 'db.sqlite3'),
+        PROMETHEUS_MULTIPROC_DIR=str(metrics_dir),
+    )
+    for args in (('migrate', '-v0'), ('send_emails', '--once')):
+        result = run_command(env, *args)
+        assert result.returncode == 0, (
+            'Проверьте, что команды manage.py работают в образе, где '
+            f'задан PROMETHEUS_MULTIPROC_DIR:\n{result.stdout}'
+        )
+    assert not metrics_dir.exists()
@@ -0,0 +1,54 @@
+import pytest
+from django.core.signals import request_started
+from django.db import connection
+
+
+@pytest.mark.django_db
+def test_metrics_are_labeled_by_route(client, titles):
+    client.get('/api/v1/titles/')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert (
+        'yamdb_requests_total{method="GET",route="titles-list",status="200"}'
+        in content
+    )
+    for metric in ('yamdb_request_duration_seconds_bucket',
+                   'yamdb_response_size_bytes_bucket',
+                   'yamdb_db_queries_bucket'):
+        assert f'{metric}{{le="+Inf",method="GET",route="titles-list"}}' in (
+            content
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_checked_on_first_use(monkeypatch):
+    monkeypatch.setitem(connection.settings_dict, 'CONN_HEALTH_CHECKS', True)
+    connection.ensure_connection()
+    checks = []
+    monkeypatch.setattr(
+        connection, 'is_usable', lambda: checks.append(1) or not checks[1:])
+
+    request_started.send(sender=None)
+    assert checks == [], (
+        'Проверьте, что соединение не проверяется, пока к БД не обратились'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.execute('SELECT 1')
+    assert checks == [1], (
+        'Проверьте, что соединение проверяется один раз за запрос'
+    )
+
+    # Вторая проверка сообщает о разорванном соединении
+    closed = []
+    close = connection.close
+    monkeypatch.setattr(
+        connection, 'close', lambda: closed.append(1) or close())
+    request_started.send(sender=None)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    assert checks == [1, 1]
+    assert closed == [1], (
+        'Проверьте, что негодное соединение закрывается перед запросом'
+    )
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+from api.urls import router_v1
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.pagination import PageNumberPagination
+
+SEED_SIZE = 25
+PAGE_SIZES = (1, 5, SEED_SIZE)
+
+# Имя маршрута: (максимум запросов к БД, максимум миллисекунд).
+# В запросы входит загрузка пользователя при аутентификации.
+BUDGETS = {
+    'api-root': (1, 500),
+    'categories-list': (3, 500),
+    'genres-list': (3, 500),
+    'titles-list': (4, 500),
+    'titles-detail': (3, 500),
+    'titles-rating-distribution': (2, 500),
+    'titles-rating-distributions': (2, 500),
+    'titles-top': (2, 500),
+    'users-list': (3, 500),
+    'users-me': (2, 500),
+    'users-detail': (2, 500),
+    'reviews-list': (4, 500),
+    'reviews-detail': (3, 500),
+    'comments-list': (4, 500),
+    'comments-detail': (3, 500),
+}
+PK_SOURCES = {
+    'titles-detail': 'title_id',
+    'titles-rating-distribution': 'title_id',
+    'reviews-detail': 'review_id',
+    'comments-detail': 'comment_id',
+}
+# Обязательные параметры строки запроса
+QUERY_SOURCES = {
+    'titles-rating-distributions': {'ids': 'title_id'},
+}
+
+
+def get_routes():
+    routes = []
+    for pattern in router_v1.urls:
+        if 'format' in pattern.pattern.regex.groupindex:
+            continue
+        actions = getattr(pattern.callback, 'actions', {'get': None})
+        if 'get' in actions:
+            routes.append(
+                (pattern.name, tuple(pattern.pattern.regex.groupindex)))
+    return routes
+
+
+ROUTES = get_routes()
+
+
+@pytest.fixture
+def seed(admin, django_user_model):
+    from reviews.models import Category, Comment, Genre, Review, Title
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(SEED_SIZE)
+    ]
+    titles = [
+        Title.objects.create(name=f'Произведение {i}', year=2000,
+                             category=category)
+        for i in range(SEED_SIZE)
+    ]
+    for title in titles:
+        title.genre.set(genres[:3])
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{i}', email=f'author{i}@yamdb.fake')
+        for i in range(SEED_SIZE)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=author, text='Отзыв', score=7)
+        for author in authors
+    ]
+    comments = [
+        Comment.objects.create(
+            review=reviews[0], author=author, text='Комментарий')
+        for author in authors
+    ]
+    return {
+        'title_id': titles[0].id,
+        'review_id': reviews[0].id,
+        'comment_id': comments[0].id,
+        'username': authors[0].username,
+    }
+
+
+def route_kwargs(name, groups, seed):
+    kwargs = {group: seed[group] for group in groups if group in seed}
+    if 'pk' in groups:
+        kwargs['pk'] = seed[PK_SOURCES[name]]
+    return kwargs
+
+
+def test_every_route_has_budget():
+    missing = {name for name, _ in ROUTES} - set(BUDGETS)
+    assert not missing, f'Задайте бюджет запросов для маршрутов {missing}'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('page_size', PAGE_SIZES)
+@pytest.mark.parametrize('name,groups', ROUTES)
+def test_route_budget(name, groups, page_size, seed, admin_api_client,
+                      monkeypatch, django_assert_max_num_queries):
+    monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+    url = reverse(name, kwargs=route_kwargs(name, groups, seed))
+    max_queries, max_ms = BUDGETS[name]
+    cache.clear()
+    with django_assert_max_num_queries(max_queries):
+        started = time.perf_counter()
+        response = admin_api_client.get(url, {
+            param: seed[source]
+            for param, source in QUERY_SOURCES.get(name, {}).items()
+        })
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, url
+    assert elapsed_ms <= max_ms, (
+        f'{url} отвечает {elapsed_ms:.0f} мс при бюджете {max_ms} мс'
+    )
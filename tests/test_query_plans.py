@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Планы запросов проверяются только на PostgreSQL'
+)
+
+
+@pytest.fixture
+def seeded(titles, django_user_model):
+    from reviews.models import Comment, Review
+    reviews = [
+        Review.objects.create(
+            title=title,
+            author=django_user_model.objects.create_user(
+                username=f'planner{i}', email=f'planner{i}@yamdb.fake'),
+            text='Отзыв',
+            score=5,
+        )
+        for i, title in enumerate(titles)
+    ]
+    for review in reviews:
+        Comment.objects.create(
+            review=review, author=review.author, text='Комментарий')
+    return reviews
+
+
+def endpoints(review):
+    title_url = f'/api/v1/titles/{review.title_id}/'
+    return (
+        '/api/v1/titles/',
+        '/api/v1/titles/?year=2003',
+        '/api/v1/titles/?search=Произведение',
+        title_url,
+        f'{title_url}reviews/',
+        f'{title_url}reviews/?cursor=',
+        f'{title_url}reviews/{review.id}/comments/',
+        f'{title_url}reviews/{review.id}/comments/?cursor=',
+    )
+
+
+@pytest.mark.django_db
+def test_endpoints_do_not_scan_sequentially(client, seeded):
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    for url in endpoints(seeded[0]):
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(url).status_code == 200
+        for query in context.captured_queries:
+            with connection.cursor() as cursor:
+                # Без этого на маленькой выборке планировщик всегда
+                # предпочтёт Seq Scan; отключение оставляет его только
+                # там, где подходящего индекса нет.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {query["sql"]}')
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+            assert 'Seq Scan' not in plan, (
+                f'{url} выполняет полный просмотр таблицы:\n'
+                f'{query["sql"]}\n{plan}'
+            )
@@ -0,0 +1,85 @@
+import pytest
+from reviews.models import Comment, Review, Title
+
+
+def rating_of(title):
+    return Title.objects.values_list(
+        'rating_sum', 'rating_count', 'rating_avg'
+    ).get(pk=title.pk)
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_reviews(self, title, user, another_user):
+        assert rating_of(title) == (0, 0, None), (
+            'Проверьте, что у произведения без отзывов нет рейтинга'
+        )
+
+        review = Review.objects.create(
+            title=title, author=user, text='a', score=10)
+        Review.objects.create(
+            title=title, author=another_user, text='b', score=5)
+        assert rating_of(title) == (15, 2, 7.5), (
+            'Проверьте, что рейтинг пересчитывается при создании отзыва'
+        )
+
+        review.score = 1
+        review.save()
+        assert rating_of(title) == (6, 2, 3.0), (
+            'Проверьте, что рейтинг пересчитывается при изменении отзыва'
+        )
+
+        review.delete()
+        assert rating_of(title) == (5, 1, 5.0), (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва'
+        )
+
+        user.delete()
+        another_user.delete()
+        assert rating_of(title) == (0, 0, None), (
+            'Проверьте, что рейтинг пересчитывается при каскадном удалении'
+        )
+
+    def test_refresh_rating(self, title, user):
+        Review.objects.create(title=title, author=user, text='a', score=8)
+        Title.objects.update(rating_sum=0, rating_count=0, rating_avg=None)
+        Title.objects.refresh_rating()
+        assert rating_of(title) == (8, 1, 8.0)
+
+    def test_stale_and_repeated_deletes(self, title, user, another_user,
+                                        admin):
+        review = Review.objects.create(
+            title=title, author=user, text='a', score=10)
+        Review.objects.create(
+            title=title, author=another_user, text='b', score=5)
+        Review.objects.create(title=title, author=admin, text='c', score=3)
+        stale = Review.objects.get(pk=review.pk)
+        review.score = 1
+        review.save()
+
+        stale.delete()
+        review.delete()
+        assert rating_of(title) == (8, 2, 4.0), (
+            'Проверьте, что повторное удаление отзыва и удаление устаревшего '
+            'экземпляра не сдвигают рейтинг'
+        )
+        title.refresh_from_db()
+        assert title.score_distribution[10] == 0
+        assert title.score_distribution[1] == 0
+
+    def test_repeated_comment_delete(self, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='a', score=10)
+        comment = Comment.objects.create(
+            review=review, author=user, text='a')
+        Comment.objects.create(review=review, author=user, text='b')
+        stale = Comment.objects.get(pk=comment.pk)
+
+        comment.delete()
+        stale.delete()
+        review.refresh_from_db()
+        assert review.comment_count == 1, (
+            'Проверьте, что повторное удаление комментария не сдвигает '
+            'счётчик'
+        )
@@ -0,0 +1,78 @@
+import pytest
+from reviews.models import Review, Title
+
+
+def distribution(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/rating-distribution/')
+    assert response.status_code == 200
+    return response.json()
+
+
+def expected(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+@pytest.mark.django_db
+class TestRatingDistribution:
+
+    def test_counters_follow_reviews(self, client, title, user,
+                                     another_user):
+        review = Review.objects.create(
+            title=title, author=user, text='a', score=10)
+        Review.objects.create(
+            title=title, author=another_user, text='b', score=5)
+        assert distribution(client, title) == {
+            'id': title.id, 'count': 2, 'distribution': expected(s5=1, s10=1)
+        }, 'Проверьте, что счётчики растут при создании отзыва'
+
+        review.score = 5
+        review.save()
+        assert distribution(client, title)['distribution'] == expected(
+            s5=2), 'Проверьте, что счётчики меняются при изменении оценки'
+
+        review.delete()
+        assert distribution(client, title)['distribution'] == expected(
+            s5=1), 'Проверьте, что счётчики уменьшаются при удалении отзыва'
+
+    def test_review_moved_to_another_title(self, client, titles, user):
+        review = Review.objects.create(
+            title=titles[0], author=user, text='a', score=3)
+        review.title = titles[1]
+        review.save()
+        assert distribution(client, titles[0])['distribution'] == expected()
+        assert distribution(client, titles[1])['distribution'] == expected(
+            s3=1)
+
+    def test_refresh_rating(self, client, title, reviews):
+        Title.objects.update(score_1=0, score_7=5)
+        Title.objects.refresh_rating()
+        assert distribution(client, title)['distribution'] == expected(
+            **{f's{score}': 1 for score in range(1, 8)})
+
+    def test_single_query(self, client, title, reviews,
+                          django_assert_num_queries):
+        with django_assert_num_queries(1):
+            client.get(f'/api/v1/titles/{title.id}/rating-distribution/')
+        response = client.get('/api/v1/titles/0/rating-distribution/')
+        assert response.status_code == 404
+
+    def test_batch(self, client, titles, reviews, title,
+                   django_assert_num_queries):
+        ids = [titles[1].id, title.id, 0, titles[1].id]
+        with django_assert_num_queries(1):
+            response = client.get(
+                '/api/v1/titles/rating-distribution/',
+                {'ids': ','.join(map(str, ids))})
+        assert response.status_code == 200
+        assert response.json() == [
+            distribution(client, titles[1]), distribution(client, title)
+        ], (
+            'Проверьте, что пакетный запрос отдаёт распределения '
+            'в порядке запроса без повторов и несуществующих id'
+        )
+
+    @pytest.mark.parametrize('ids', ('', 'a,1', ','.join(['1'] * 101)))
+    def test_batch_validation(self, client, ids):
+        response = client.get(
+            '/api/v1/titles/rating-distribution/', {'ids': ids})
+        assert response.status_code == 400
@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestReviewPagination:
+
+    def test_page_number_by_default(self, client, title, reviews):
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.json()['count'] == 7
+
+    def test_cursor_pagination(self, client, title, reviews):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        first = client.get(url, {'cursor': '', 'page_size': 4}).json()
+        assert 'count' not in first, (
+            'Проверьте, что параметр cursor включает курсорную пагинацию'
+        )
+        second = client.get(first['next']).json()
+        assert second['next'] is None
+        seen = [review['id'] for review in first['results'] + second['results']]
+        assert seen == [review.id for review in reversed(reviews)]
+
+    def test_cursor_page_size_is_capped(self, client, title, reviews,
+                                        monkeypatch):
+        from api.pagination import PubDateCursorPagination
+        monkeypatch.setattr(PubDateCursorPagination, 'max_page_size', 2)
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'cursor': '', 'page_size': 100}
+        )
+        assert len(response.json()['results']) == 2
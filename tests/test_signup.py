@@ -0,0 +1,116 @@
+import pytest
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+class TestSignupEmails:
+    url = '/api/v1/auth/signup/'
+
+    def test_signup_enqueues_email(self, client, mailoutbox):
+        from api.models import OutgoingEmail
+        response = client.post(
+            self.url, {'username': 'newbie', 'email': 'newbie@yamdb.fake'})
+        assert response.status_code == 200
+        assert len(mailoutbox) == 0, (
+            'Проверьте, что signup не отправляет письмо в запросе'
+        )
+        assert OutgoingEmail.objects.due().count() == 1
+
+        call_command('send_emails', '--once')
+        assert [mail.to for mail in mailoutbox] == [['newbie@yamdb.fake']]
+        assert not OutgoingEmail.objects.due().exists()
+
+    def test_failed_email_is_retried_later(self, client, monkeypatch):
+        from api.models import OutgoingEmail
+
+        def fail(*args, **kwargs):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr('django.core.mail.EmailMessage.send', fail)
+        client.post(
+            self.url, {'username': 'newbie', 'email': 'newbie@yamdb.fake'})
+        call_command('send_emails', '--once')
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert not OutgoingEmail.objects.due().exists(), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+
+    def test_mail_server_down(self, client, monkeypatch, mailoutbox):
+        from api.management.commands.send_emails import Command
+        from api.models import MAX_SEND_ATTEMPTS, OutgoingEmail
+
+        def refuse(*args, **kwargs):
+            raise ConnectionRefusedError('SMTP недоступен')
+
+        monkeypatch.setattr(
+            'django.core.mail.backends.locmem.EmailBackend.open', refuse)
+        client.post(
+            self.url, {'username': 'newbie', 'email': 'newbie@yamdb.fake'})
+        command = Command()
+        assert command.send_batch(10) == 0, (
+            'Проверьте, что ошибка подключения не завершает воркер'
+        )
+        email = OutgoingEmail.objects.get()
+        assert (email.attempts, email.last_error) == (0, 'SMTP недоступен'), (
+            'Проверьте, что недоступность сервера не расходует попытки'
+        )
+        assert not OutgoingEmail.objects.due().exists()
+        assert command.pause(5) == 10, (
+            'Проверьте, что воркер ждёт дольше после неудачного подключения'
+        )
+
+        # Простой дольше, чем хватило бы попыток
+        for _ in range(MAX_SEND_ATTEMPTS + 1):
+            OutgoingEmail.objects.update(send_after=timezone.now())
+            command.send_batch(10)
+        monkeypatch.undo()
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        assert command.send_batch(10) == 1
+        assert len(mailoutbox) == 1, (
+            'Проверьте, что письмо уходит после восстановления сервера'
+        )
+
+    def test_give_up_is_logged(self, client, monkeypatch, caplog):
+        from api.management.commands.send_emails import Command
+        from api.models import MAX_SEND_ATTEMPTS, OutgoingEmail
+
+        def reject(*args, **kwargs):
+            raise ValueError('Адрес отклонён')
+
+        monkeypatch.setattr(EmailMessage, 'send', reject)
+        client.post(
+            self.url, {'username': 'newbie', 'email': 'newbie@yamdb.fake'})
+        command = Command()
+        for _ in range(MAX_SEND_ATTEMPTS):
+            OutgoingEmail.objects.update(send_after=timezone.now())
+            command.send_batch(10)
+        assert not OutgoingEmail.objects.due().exists()
+        assert 'не отправлено за 5 попыток' in caplog.text, (
+            'Проверьте, что отказ от письма пишется в лог'
+        )
+
+    def test_emails_claimed_before_sending(self, client, monkeypatch,
+                                           mailoutbox):
+        from api.models import OutgoingEmail
+        send = EmailMessage.send
+        due_while_sending = []
+
+        def check_claimed(message, *args, **kwargs):
+            due_while_sending.append(OutgoingEmail.objects.due().count())
+            return send(message, *args, **kwargs)
+
+        monkeypatch.setattr(EmailMessage, 'send', check_claimed)
+        for i in range(2):
+            client.post(self.url, {
+                'username': f'newbie{i}', 'email': f'newbie{i}@yamdb.fake'
+            })
+        call_command('send_emails', '--once')
+        assert due_while_sending == [0, 0], (
+            'Проверьте, что письма забираются до отправки и другой воркер '
+            'их не возьмёт'
+        )
+        assert len(mailoutbox) == 2
@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_titles_only_requested_columns(self, client, titles):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/', {'fields': 'id,name'})
+        assert response.status_code == 200
+        result = response.json()['results'][0]
+        assert result == {'id': titles[-1].id, 'name': titles[-1].name}
+        # COUNT и произведения, без жанров и категории
+        assert len(context.captured_queries) == 2
+        sql = context.captured_queries[-1]['sql']
+        assert 'description' not in sql and 'category' not in sql, (
+            'Проверьте, что незапрошенные столбцы не выбираются из БД'
+        )
+
+    def test_titles_with_relations(self, client, titles,
+                                   django_assert_num_queries):
+        # жанры и категория хранятся в строке списка
+        with django_assert_num_queries(2):
+            response = client.get(
+                '/api/v1/titles/', {'fields': 'genre,category,rating'})
+        result = response.json()['results'][0]
+        assert set(result) == {'genre', 'category', 'rating'}
+        assert len(result['genre']) == 3
+        assert result['category'] == {'name': 'Фильм', 'slug': 'movie'}
+
+    def test_title_detail(self, client, titles):
+        response = client.get(
+            f'/api/v1/titles/{titles[0].id}/', {'fields': 'year'})
+        assert response.json() == {'year': titles[0].year}
+
+    def test_unknown_field(self, client, titles):
+        response = client.get('/api/v1/titles/', {'fields': 'id,password'})
+        assert response.status_code == 400
+        assert 'fields' in response.json()
+
+    def test_reviews_with_cursor(self, client, title, reviews,
+                                 django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # произведение из URL и страница отзывов
+        with django_assert_num_queries(2):
+            response = client.get(
+                url, {'fields': 'id,author', 'cursor': '', 'page_size': 3})
+        data = response.json()
+        assert data['results'][0] == {
+            'id': reviews[-1].id, 'author': reviews[-1].author.username
+        }
+        assert data['next'] is not None
+
+    def test_comments(self, client, title, reviews, user):
+        from reviews.models import Comment
+        Comment.objects.create(review=reviews[0], author=user, text='Да')
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/comments/',
+            {'fields': 'text'}
+        )
+        assert response.json()['results'] == [{'text': 'Да'}]
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    from api.throttling import TokenBucketThrottle
+    rates = {'auth': '2/min', 'read': '3/min', 'write': '2/min'}
+    monkeypatch.setattr(TokenBucketThrottle, 'THROTTLE_RATES', rates)
+    return rates
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('api.throttling.time.time', lambda: now[0])
+    return now
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_auth_limit_and_retry_after(self, client, rates, clock):
+        from api.metrics import THROTTLED
+        before = THROTTLED.labels('auth')._value.get()
+        for i in range(2):
+            client.post('/api/v1/auth/signup/', {'username': f'u{i}'})
+        response = client.post('/api/v1/auth/token/', {'username': 'u0'})
+        assert response.status_code == 429
+        # токен пополняется раз в 30 секунд
+        assert response['Retry-After'] == '30'
+        assert THROTTLED.labels('auth')._value.get() == before + 1, (
+            'Проверьте, что отклонённые запросы попадают в метрики'
+        )
+
+    def test_bucket_refills(self, client, title, rates, clock):
+        url = f'/api/v1/titles/{title.id}/'
+        for _ in range(3):
+            assert client.get(url).status_code == 200
+        assert client.get(url).status_code == 429
+        clock[0] += 20
+        assert client.get(url).status_code == 200, (
+            'Проверьте, что корзина пополняется со временем'
+        )
+        assert client.get(url).status_code == 429
+
+    def test_writes_limited_per_user(self, user_api_client, another_user,
+                                     title, rates, clock):
+        from .fixtures.fixture_data import api_client_for
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        for score in (1, 2):
+            user_api_client.post(url, {'text': 'Отзыв', 'score': score})
+        response = user_api_client.post(url, {'text': 'Отзыв', 'score': 3})
+        assert response.status_code == 429
+        assert user_api_client.get(url).status_code == 200, (
+            'Проверьте, что чтение считается отдельно от записи'
+        )
+        response = api_client_for(another_user).post(
+            url, {'text': 'Отзыв', 'score': 3})
+        assert response.status_code == 201
+
+    def test_client_address_from_proxy(self, client, rates, clock):
+        # nginx дописывает настоящий адрес в конец X-Forwarded-For
+        for i in range(2):
+            client.post('/api/v1/auth/signup/', {'username': f'u{i}'},
+                        HTTP_X_FORWARDED_FOR=f'6.6.6.{i}, 10.0.0.5')
+        response = client.post(
+            '/api/v1/auth/signup/', {'username': 'u2'},
+            HTTP_X_FORWARDED_FOR='6.6.6.2, 10.0.0.5')
+        assert response.status_code == 429, (
+            'Проверьте, что подделанный X-Forwarded-For не даёт новую корзину'
+        )
+        response = client.post(
+            '/api/v1/auth/signup/', {'username': 'u2'},
+            HTTP_X_FORWARDED_FOR='10.0.0.6')
+        assert response.status_code != 429, (
+            'Проверьте, что клиенты за nginx не делят одну корзину'
+        )
+
+
+def test_concurrent_requests_share_bucket(rates, clock, monkeypatch):
+    # Блокировка корзины рассчитана на атомарный cache.add, как у LocMemCache
+    # внутри процесса или у memcached и Redis, см. TokenBucketThrottle
+    from api.throttling import ReadThrottle
+    from django.core.cache.backends.locmem import LocMemCache
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    cache = LocMemCache('throttle-test', {})
+    read = cache.get
+
+    def slow_get(*args, **kwargs):
+        value = read(*args, **kwargs)
+        # Расширяет окно между чтением и записью корзины
+        time.sleep(0.01)
+        return value
+
+    monkeypatch.setattr(cache, 'get', slow_get)
+    monkeypatch.setattr(ReadThrottle, 'cache', cache)
+    request = Request(APIRequestFactory().get('/api/v1/titles/'))
+    allowed = []
+
+    def hit():
+        allowed.append(ReadThrottle().allow_request(request, None))
+
+    threads = [threading.Thread(target=hit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert allowed.count(True) == 3, (
+        'Проверьте, что параллельные запросы не превышают лимит'
+    )
+
+
+def test_busy_lock_does_not_reject(rates, clock):
+    from api.throttling import ReadThrottle
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    request = Request(APIRequestFactory().get('/api/v1/titles/'))
+    throttle = ReadThrottle()
+    key = throttle.get_cache_key(request, None)
+    throttle.cache.add(f'{key}:lock', 1, 60)
+    throttle.lock_wait = 0
+    assert throttle.allow_request(request, None), (
+        'Проверьте, что занятая блокировка не отклоняет клиента с токенами'
+    )
+    assert [ReadThrottle().allow_request(request, None)
+            for _ in range(3)] == [True, True, False]
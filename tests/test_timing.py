@@ -0,0 +1,67 @@
+import time
+
+import pytest
+from api.serializers import TitleSerializer, ValuesSerializer
+
+
+def spans(response):
+    return {
+        name: float(value)
+        for name, _, value in (
+            metric.strip().partition(';dur=')
+            for metric in response['Server-Timing'].split(',')
+        )
+        if value
+    }
+
+
+@pytest.mark.django_db
+class TestRequestTiming:
+
+    def test_server_timing_header(self, client, titles, settings, caplog):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1
+        response = client.get('/api/v1/titles/')
+        header = response['Server-Timing']
+        for metric in (
+            'total;dur=', 'db;dur=', 'view;dur=', 'serialize;dur=',
+            'render;dur=',
+        ):
+            assert metric in header
+        assert 'queries;desc="2"' in header
+        assert '"route": "titles-list"' in caplog.text
+
+    def test_not_sampled(self, client, settings):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 0
+        assert not client.get('/api/v1/').has_header('Server-Timing')
+
+    def test_serialization_is_not_in_view(self, client, title, settings,
+                                          monkeypatch):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1
+        to_representation = TitleSerializer.to_representation
+
+        def slow_to_representation(self, instance):
+            time.sleep(0.05)
+            return to_representation(self, instance)
+
+        monkeypatch.setattr(
+            TitleSerializer, 'to_representation', slow_to_representation)
+        timings = spans(client.get(f'/api/v1/titles/{title.id}/'))
+        assert timings['serialize'] >= 50
+        assert timings['view'] < 50, (
+            'Проверьте, что сериализация ответа не входит в спан view'
+        )
+
+    def test_values_serialization_is_not_in_view(self, client, titles,
+                                                 settings, monkeypatch):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1
+        data = ValuesSerializer.data.fget
+
+        def slow_data(self):
+            time.sleep(0.05)
+            return data(self)
+
+        monkeypatch.setattr(ValuesSerializer, 'data', property(slow_data))
+        timings = spans(client.get('/api/v1/titles/'))
+        assert timings['serialize'] >= 50
+        assert timings['view'] < 50
+        assert timings['render'] < timings['total'] - timings['serialize']
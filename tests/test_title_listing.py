@@ -0,0 +1,79 @@
+import pytest
+from django.core.management import call_command
+
+
+def listed(client, title_id, **params):
+    results = client.get('/api/v1/titles/', params).json()['results']
+    return next(
+        (result for result in results if result['id'] == title_id), None)
+
+
+@pytest.mark.django_db
+class TestTitleListingRefresh:
+
+    def test_title_update(self, client, admin_api_client, titles):
+        title = titles[-1]
+        admin_api_client.patch(
+            f'/api/v1/titles/{title.id}/',
+            {'name': 'Новое имя', 'genre': ['genre-2']}, format='json')
+        result = listed(client, title.id)
+        assert result['name'] == 'Новое имя'
+        assert [genre['slug'] for genre in result['genre']] == ['genre-2'], (
+            'Проверьте, что строка списка обновляется вместе с жанрами'
+        )
+
+    def test_category_and_genre_changes(self, client, titles, category):
+        from reviews.models import Genre
+        category.name = 'Кино'
+        category.save()
+        assert listed(client, titles[-1].id)['category']['name'] == 'Кино'
+        Genre.objects.get(slug='genre-0').delete()
+        slugs = [genre['slug'] for genre in listed(
+            client, titles[-1].id)['genre']]
+        assert 'genre-0' not in slugs
+        category.delete()
+        assert listed(client, titles[-1].id)['category'] == {
+            'name': '', 'slug': ''
+        }
+
+    def test_reviews_change_rating(self, client, title, reviews):
+        from reviews.models import TitleListing
+        listing = TitleListing.objects.get(title=title)
+        assert listing.review_count == 7
+        assert listed(client, title.id)['rating'] == 4
+        for review in reviews[:5]:
+            review.delete()
+        listing.refresh_from_db()
+        assert listing.review_count == 2
+        assert listed(client, title.id)['rating'] == round(6.5)
+
+    def test_filters_read_listing(self, client, titles):
+        titles[2].genre.clear()
+        ids = [
+            result['id'] for result in client.get(
+                '/api/v1/titles/', {'genre': 'genre-1', 'year': 2002}
+            ).json()['results']
+        ]
+        assert ids == []
+        ids = [
+            result['id'] for result in client.get(
+                '/api/v1/titles/', {'category': 'mov', 'name': 'ение 3'}
+            ).json()['results']
+        ]
+        assert ids == [titles[3].id]
+
+    def test_bulk_created_titles_listed(self, client, admin_api_client,
+                                        titles):
+        response = admin_api_client.post('/api/v1/titles/', [
+            {'name': 'Пачка', 'year': 2001, 'genre': ['genre-1'],
+             'category': 'movie'}
+        ], format='json')
+        result = listed(client, response.json()[0]['id'])
+        assert result == response.json()[0]
+
+    def test_rebuild_command(self, client, titles):
+        from reviews.models import TitleListing
+        TitleListing.objects.all().delete()
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+        call_command('rebuild_title_listing')
+        assert client.get('/api/v1/titles/').json()['count'] == len(titles)
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+
+    def test_list_query_count(self, client, titles,
+                              django_assert_num_queries):
+        # COUNT для пагинации и страница готовых строк TitleListing
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 5
+        assert len(response.json()['results'][0]['genre']) == 3
+
+    def test_detail_query_count(self, client, titles,
+                                django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{titles[0].id}/')
+        assert response.status_code == 200
+        assert response.json()['category'] == {
+            'name': 'Фильм', 'slug': 'movie'
+        }
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_by_name_and_description(self, client, titles):
+        titles[3].description = 'Про поезда и вокзалы'
+        titles[3].save()
+        response = client.get('/api/v1/titles/', {'search': 'поезда'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[3].id
+        ]
+        response = client.get('/api/v1/titles/', {'search': 'ведение 7'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[7].id
+        ]
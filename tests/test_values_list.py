@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def catalog(titles, reviews, title, user):
+    from reviews.models import Comment
+    # произведение без категории и жанров
+    title.category = None
+    title.description = 'Первый фильм'
+    title.save()
+    for review in reviews[:2]:
+        for i in range(3):
+            Comment.objects.create(
+                review=review, author=user, text=f'Комментарий {i}')
+    return title
+
+
+def review_urls(title, reviews):
+    review_url = f'/api/v1/titles/{title.id}/reviews/'
+    return (
+        (review_url, {}),
+        (review_url, {'cursor': '', 'page_size': 4}),
+        (f'{review_url}{reviews[0].id}/comments/', {}),
+    )
+
+
+@pytest.mark.django_db
+class TestValuesListPath:
+
+    @pytest.mark.parametrize('params', (
+        {}, {'page': 3}, {'genre': 'genre-1', 'year': 2003},
+        {'fields': 'id,genre,category'},
+    ))
+    def test_titles_match_serializer(self, client, catalog, params):
+        from api.serializers import TitleSerializer
+        from reviews.models import Title
+        results = client.get('/api/v1/titles/', params).json()['results']
+        assert results
+        titles = Title.objects.select_related('category').prefetch_related(
+            'genre').in_bulk([result['id'] for result in results])
+        expected = [
+            TitleSerializer(titles[result['id']]).data for result in results
+        ]
+        if 'fields' in params:
+            fields = params['fields'].split(',')
+            expected = [
+                {key: value for key, value in item.items() if key in fields}
+                for item in expected
+            ]
+        assert json.dumps(results) == json.dumps(expected), (
+            'Проверьте, что строки TitleListing отдаются в виде '
+            'TitleSerializer'
+        )
+
+    def test_same_bytes_as_serializers(self, client, catalog, reviews,
+                                       monkeypatch):
+        from api.views import CommentViewSet, ReviewViewSet
+        fast = [
+            client.get(url, params).content
+            for url, params in review_urls(catalog, reviews)
+        ]
+        for viewset in (ReviewViewSet, CommentViewSet):
+            monkeypatch.setattr(viewset, 'values_serializer_class', None)
+        full = [
+            client.get(url, params).content
+            for url, params in review_urls(catalog, reviews)
+        ]
+        assert fast == full, (
+            'Проверьте, что быстрый путь отдаёт тот же ответ, '
+            'что и сериализаторы'
+        )
+
+    def test_query_count(self, client, catalog, django_assert_num_queries):
+        # COUNT и страница готовых строк TitleListing
+        with django_assert_num_queries(2):
+            client.get('/api/v1/titles/')
@@ -0,0 +1,99 @@
+import pytest
+
+# В тестах каждая транзакция — точка сохранения: SAVEPOINT и RELEASE
+# считаются отдельными запросами.
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def url(self, title_id):
+        return f'/api/v1/titles/{title_id}/reviews/'
+
+    def test_query_count(self, user_api_client, title,
+                         django_assert_num_queries):
+        user_api_client.get('/api/v1/')
+        # вставка отзыва, сдвиг рейтинга произведения и его строки списка
+        with django_assert_num_queries(5):
+            response = user_api_client.post(
+                self.url(title.id), {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        title.refresh_from_db()
+        assert title.rating_avg == 7
+
+    def test_second_review_rejected(self, user_api_client, title):
+        user_api_client.post(self.url(title.id), {'text': 'Раз', 'score': 7})
+        response = user_api_client.post(
+            self.url(title.id), {'text': 'Два', 'score': 1})
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.json()
+        title.refresh_from_db()
+        assert (title.rating_count, title.rating_avg) == (1, 7), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг'
+        )
+
+    def test_missing_title(self, user_api_client, title):
+        from reviews.models import Review
+        response = user_api_client.post(
+            self.url(title.id + 1), {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 404
+        assert not Review.objects.exists()
+
+
+@pytest.mark.django_db
+class TestCommentCreate:
+
+    def test_query_count(self, user_api_client, title, reviews,
+                         django_assert_num_queries):
+        user_api_client.get('/api/v1/')
+        url = f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/comments/'
+        # отзыв вместе с проверкой произведения, вставка комментария
+        # и сдвиг счётчика комментариев отзыва
+        with django_assert_num_queries(5):
+            response = user_api_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 201
+        reviews[0].refresh_from_db()
+        assert reviews[0].comment_count == 1
+
+    def test_review_of_another_title(self, user_api_client, title, reviews):
+        from reviews.models import Title
+        other = Title.objects.create(name='Другое', year=2000)
+        url = f'/api/v1/titles/{other.id}/reviews/{reviews[0].id}/comments/'
+        assert user_api_client.post(
+            url, {'text': 'Комментарий'}).status_code == 404
+        assert user_api_client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+class TestSignupQueries:
+    url = '/api/v1/auth/signup/'
+
+    def test_new_user(self, client, django_assert_num_queries):
+        # поиск по username и email, вставка пользователя и письма
+        with django_assert_num_queries(5):
+            response = client.post(
+                self.url, {'username': 'newbie', 'email': 'new@yamdb.fake'})
+        assert response.status_code == 200
+
+    def test_existing_user(self, client, user, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = client.post(
+                self.url, {'username': user.username, 'email': user.email})
+        assert response.status_code == 200
+        assert response.json() == {
+            'username': user.username, 'email': user.email
+        }
+
+    @pytest.mark.parametrize('data, field', (
+        ({'username': 'TestUser', 'email': 'other@yamdb.fake'}, 'username'),
+        ({'username': 'other', 'email': 'testuser@yamdb.fake'}, 'email'),
+    ))
+    def test_taken(self, client, user, data, field):
+        response = client.post(self.url, data)
+        assert response.status_code == 400
+        assert list(response.json()) == [field]
+
+    def test_username_me(self, client):
+        response = client.post(
+            self.url, {'username': 'me', 'email': 'me@yamdb.fake'})
+        assert response.status_code == 400